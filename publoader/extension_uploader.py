@@ -1,17 +1,20 @@
 import configparser
 import json
 import logging
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional
 
 from publoader.manga_uploader import MangaUploaderProcess
 from publoader.models.database import update_expired_chapter_database
 from publoader.models.dataclasses import Chapter, Manga
-from publoader.utils.config import ratelimit_time, resources_path
+from publoader.utils.config import max_requests, ratelimit_time, resources_path
 from publoader.utils.misc import format_title, get_md_api
 from publoader.webhook import PubloaderNotIndexedWebhook, PubloaderWebhook
 
 logger = logging.getLogger("publoader")
+manga_data_lock = threading.Lock()
 
 
 class ExtensionUploader:
@@ -180,19 +183,21 @@ class ExtensionUploader:
                     )
                 )
 
-            for manga in tracked_manga_data:
-                manga_id = manga["id"]
-                manga_title = format_title(manga)
-                if manga_id not in self.manga_data_local:
-                    self.manga_data_local.update(
-                        {manga_id: {"id": manga_id, "title": manga_title}}
-                    )
-
-            with open(
-                resources_path.joinpath(self.config["Paths"]["manga_data_path"]),
-                "w",
-            ) as json_file:
-                json.dump(self.manga_data_local, json_file, indent=2)
+            # The manga data is shared between extensions running concurrently.
+            with manga_data_lock:
+                for manga in tracked_manga_data:
+                    manga_id = manga["id"]
+                    manga_title = format_title(manga)
+                    if manga_id not in self.manga_data_local:
+                        self.manga_data_local.update(
+                            {manga_id: {"id": manga_id, "title": manga_title}}
+                        )
+
+                with open(
+                    resources_path.joinpath(self.config["Paths"]["manga_data_path"]),
+                    "w",
+                ) as json_file:
+                    json.dump(self.manga_data_local, json_file, indent=2)
 
         return self.manga_data_local
 
@@ -275,36 +280,49 @@ class ExtensionUploader:
         else:
             logger.info("No uploaded chapter mangadex ids.")
 
+    def _upload_manga_chapters(self, mangadex_manga_id: str, last_manga: bool):
+        """Find the chapters to upload, edit and skip for a single manga."""
+        all_chapters = None
+        if self.all_manga_chapters is not None:
+            all_chapters = self.all_manga_chapters.get(mangadex_manga_id, [])
+
+        manga_uploader = MangaUploaderProcess(
+            extension_name=self.extension_name,
+            clean_db=self.clean_db,
+            updated_chapters=self.updated_manga_chapters.get(mangadex_manga_id, []),
+            all_manga_chapters=all_chapters,
+            mangadex_manga_id=mangadex_manga_id,
+            mangadex_group_id=self.mangadex_group_id,
+            total_chapters_on_md=self.chapters_on_md,
+            current_uploaded_chapters=self.current_uploaded_chapters,
+            override_options=self.override_options,
+            same_chapter_dict=self.same_chapter_dict,
+            mangadex_manga_data=self.manga_data_local.get(mangadex_manga_id, {}),
+            chapters_on_db=self.chapters_on_db,
+            languages=self.extension_languages,
+            chapters_for_upload=self.chapters_for_upload,
+            chapters_for_skipping=self.chapters_for_skipping,
+            chapters_for_editing=self.chapters_for_editing,
+        )
+        manga_uploader.start_manga_uploading_process(last_manga)
+
     def upload_chapters(self):
         """Go through each new chapter and upload it to mangadex."""
-        # Sort each chapter by manga
-        for index, mangadex_manga_id in enumerate(self.updated_manga_chapters, start=1):
-            all_chapters = None
-            if self.all_manga_chapters is not None:
-                all_chapters = self.all_manga_chapters.get(mangadex_manga_id, [])
-
-            manga_uploader = MangaUploaderProcess(
-                extension_name=self.extension_name,
-                clean_db=self.clean_db,
-                updated_chapters=self.updated_manga_chapters.get(mangadex_manga_id, []),
-                all_manga_chapters=all_chapters,
-                mangadex_manga_id=mangadex_manga_id,
-                mangadex_group_id=self.mangadex_group_id,
-                total_chapters_on_md=self.chapters_on_md,
-                current_uploaded_chapters=self.current_uploaded_chapters,
-                override_options=self.override_options,
-                same_chapter_dict=self.same_chapter_dict,
-                mangadex_manga_data=self.manga_data_local.get(mangadex_manga_id, {}),
-                chapters_on_db=self.chapters_on_db,
-                languages=self.extension_languages,
-                chapters_for_upload=self.chapters_for_upload,
-                chapters_for_skipping=self.chapters_for_skipping,
-                chapters_for_editing=self.chapters_for_editing,
-            )
-            manga_uploader.start_manga_uploading_process(
-                index == len(self.updated_manga_chapters)
-            )
-            time.sleep(0.5)
+        # Each manga's MangaDex lookups are independent, overlap them. The http
+        # client caps the requests in flight across all threads.
+        with ThreadPoolExecutor(max_workers=max(1, max_requests)) as executor:
+            futures = [
+                executor.submit(
+                    self._upload_manga_chapters,
+                    mangadex_manga_id,
+                    index == len(self.updated_manga_chapters),
+                )
+                for index, mangadex_manga_id in enumerate(
+                    self.updated_manga_chapters, start=1
+                )
+            ]
+            for future in futures:
+                future.result()
 
         if self.current_uploaded_chapters:
             self._check_all_chapters_uploaded()
@@ -1,15 +1,23 @@
 import json
 import logging
+import threading
 import time
 from datetime import datetime
 
 import requests
+from requests.adapters import HTTPAdapter
 
 from publoader import __version__
 from publoader.http.oauth import OAuth2
 from publoader.http.properties import RequestError, http_error_codes
 from publoader.http.response import HTTPResponse
-from publoader.utils.config import config, mangadex_api_url, root_path, upload_retry
+from publoader.utils.config import (
+    config,
+    mangadex_api_url,
+    max_requests,
+    root_path,
+    upload_retry,
+)
 from publoader.utils.singleton import Singleton
 
 logger = logging.getLogger("publoader")
@@ -29,6 +37,19 @@ class HTTPModel(metaclass=Singleton):
         self.previous_status = 0
         self.total_not_login_row = 0
 
+        # Every thread shares this client, cap how many requests are in flight
+        # and let only one thread log in at a time.
+        self.max_concurrent_requests = max(1, max_requests)
+        self._request_slots = threading.BoundedSemaphore(self.max_concurrent_requests)
+        # One pooled keep-alive connection for each request slot
+        self.session.mount(
+            "https://", HTTPAdapter(pool_maxsize=self.max_concurrent_requests)
+        )
+        self._login_lock = threading.RLock()
+        # Ratelimit counters and the pause every thread waits out before sending
+        self._ratelimit_lock = threading.Lock()
+        self._ratelimit_resume_at = 0.0
+
         self._config = config
         self._token_file = root_path.joinpath(config["Paths"]["mdauth_path"])
         self._file_token = self._open_auth_file()
@@ -55,22 +76,22 @@ class HTTPModel(metaclass=Singleton):
     def _calculate_sleep_time(
         self, status_code: "int", wait: "bool", headers: "dict"
     ) -> "bool":
-        self.number_of_requests += 1
-        self.total_requests += 1
+        with self._ratelimit_lock:
+            self.number_of_requests += 1
+            self.total_requests += 1
+            number_of_requests = self.number_of_requests
         loop = False
 
         limit = int(headers.get("x-ratelimit-limit", self.max_requests))
         remaining = int(
-            headers.get(
-                "x-ratelimit-remaining", self.max_requests - self.number_of_requests
-            )
+            headers.get("x-ratelimit-remaining", self.max_requests - number_of_requests)
         )
         retry_after = headers.get("x-ratelimit-retry-after", None)
 
         logger.debug(f"limit: {limit}")
         logger.debug(f"remaining: {remaining}")
         logger.debug(f"retry_after: {retry_after}")
-        logger.debug(f"number_of_requests: {self.number_of_requests}")
+        logger.debug(f"number_of_requests: {number_of_requests}")
 
         delta = self.max_requests
         sleep = delta / limit
@@ -101,14 +122,30 @@ class HTTPModel(metaclass=Singleton):
             if not wait and status_code != 429 and remaining > 0:
                 return loop
 
-            self.number_of_requests = 0
             logger.debug(f"Sleeping {sleep} seconds")
-            time.sleep(sleep)
+            self._pause_requests(sleep, reset_count=True)
 
             if remaining == 0 and status_code != 429:
                 loop = False
         return loop
 
+    def _pause_requests(self, seconds: "float", reset_count: "bool" = False) -> None:
+        """Hold back every thread's requests for the given seconds."""
+        with self._ratelimit_lock:
+            if reset_count:
+                self.number_of_requests = 0
+            self._ratelimit_resume_at = max(
+                self._ratelimit_resume_at, time.monotonic() + seconds
+            )
+        time.sleep(seconds)
+
+    def _wait_for_ratelimit(self) -> None:
+        """Wait out a pause another thread started after hitting the ratelimit."""
+        with self._ratelimit_lock:
+            wait = self._ratelimit_resume_at - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+
     def _format_request_log(
         self,
         method: "str",
@@ -157,9 +194,12 @@ class HTTPModel(metaclass=Singleton):
             try:
                 run_number += 1
 
-                response = self.session.request(
-                    method, route, json=json, params=params, data=data, files=files
-                )
+                sent_authorization = self.session.headers.get("Authorization")
+                with self._request_slots:
+                    self._wait_for_ratelimit()
+                    response = self.session.request(
+                        method, route, json=json, params=params, data=data, files=files
+                    )
                 logger.debug(
                     f"Initial Request: Code {response.status_code}, URL: {response.url}"
                 )
@@ -208,7 +248,7 @@ class HTTPModel(metaclass=Singleton):
             if response.status_code == 401:
                 response_obj.print_error()
                 try:
-                    self._login()
+                    self._relogin(sent_authorization)
                 except Exception as e:
                     logger.error(e)
 
@@ -219,7 +259,7 @@ class HTTPModel(metaclass=Singleton):
             elif response.status_code == 429:
                 response_obj.print_error()
                 print(f"429: {http_error_codes.get('429')}")
-                time.sleep(90)
+                self._pause_requests(90)
 
                 if total_retry <= 0:
                     break
@@ -238,29 +278,38 @@ class HTTPModel(metaclass=Singleton):
         raise RequestError(formatted_request_string)
 
     def _login(self) -> "bool":
-        if self._first_login:
-            logger.debug("Trying to login through the mdauth file.")
+        with self._login_lock:
+            if self._first_login:
+                logger.debug("Trying to login through the mdauth file.")
 
-        if self.access_token is not None:
-            self._update_headers(self.access_token)
-            logged_in = self._check_login()
-        else:
-            logged_in = self._refresh_token_md()
+            if self.access_token is not None:
+                self._update_headers(self.access_token)
+                logged_in = self._check_login()
+            else:
+                logged_in = self._refresh_token_md()
 
-        if logged_in:
-            self._successful_login = True
+            if logged_in:
+                self._successful_login = True
 
-            self._update_headers(self.access_token)
-            self._save_tokens(self.access_token, self.refresh_token)
+                self._update_headers(self.access_token)
+                self._save_tokens(self.access_token, self.refresh_token)
 
-            if self._first_login:
-                logger.info(f"Logged into mangadex.")
-                print("Logged in.")
-                self._first_login = False
-            return True
-        else:
-            logger.critical("Couldn't login.")
-            raise Exception("Couldn't login.")
+                if self._first_login:
+                    logger.info(f"Logged into mangadex.")
+                    print("Logged in.")
+                    self._first_login = False
+                return True
+            else:
+                logger.critical("Couldn't login.")
+                raise Exception("Couldn't login.")
+
+    def _relogin(self, sent_authorization: "str") -> "bool":
+        """Log in again after a 401, unless another thread already replaced the
+        token the request was sent with."""
+        with self._login_lock:
+            if self.session.headers.get("Authorization") != sent_authorization:
+                return True
+            return self._login()
 
     def _open_auth_file(self) -> "dict":
         """Open auth file and read saved tokens."""
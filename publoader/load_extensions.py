@@ -251,7 +251,7 @@ def load_extension(extension: Path, clean_db: bool = False, general_run: bool =
             title=f"Error in {normalised_extension_name}",
             description=f"An exception occurred:\n```\n{str(e)}\n```",
             colour="FF0000",
-        ).send()
+        ).send(sync=True)
         return
 
 
@@ -413,7 +413,7 @@ def run_extension(extension: dict, clean_db_override: bool = False):
             title=f"Error in {extension_name}",
             description=f"An exception occurred:\n```\n{str(e)}\n```",
             colour="FF0000",
-        ).send()
+        ).send(sync=True)
         return
 
 
@@ -440,7 +440,7 @@ def run_extensions(extensions: dict, clean_db_override: bool):
                 title=f"Error in {extension_name}",
                 description=f"An exception occurred:\n```\n{str(e)}\n```",
                 colour="FF0000",
-            ).send()
+            ).send(sync=True)
             continue
 
         if data is not None and data:
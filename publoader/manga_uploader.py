@@ -1,5 +1,4 @@
 import logging
-import re
 import traceback
 from typing import Dict, List, Optional
 
@@ -16,10 +15,9 @@ from publoader.models.database import (
 )
 from publoader.models.dataclasses import Chapter
 from publoader.utils.misc import (
+    build_reverse_index,
     check_chapter_url_same,
     fetch_aggregate,
-    find_key_from_list_value,
-    flatten,
     get_md_api,
 )
 
@@ -58,8 +56,13 @@ class MangaUploaderProcess:
         self.mangadex_manga_id = mangadex_manga_id
         self.mangadex_group_id = mangadex_group_id
         self.posted_md_updates = current_uploaded_chapters
+        self.posted_chapter_ids = {
+            str(chapter.chapter_id) for chapter in self.posted_md_updates
+        }
         self.override_options = override_options
         self.same_chapter_dict = same_chapter_dict
+        # Chapter ids mapped to the master chapter id they're the same as
+        self.same_chapter_ids = build_reverse_index(same_chapter_dict)
         self.mangadex_manga_data = mangadex_manga_data
 
         if not self.mangadex_manga_data.get("title", None):
@@ -162,58 +165,45 @@ class MangaUploaderProcess:
 
     def _check_for_duplicate_chapter_md_list(self, chapter) -> Optional[dict]:
         """Check if chapter exists on MangaDex already."""
-        for md_chapter in self.chapters_on_md:
-            if not md_chapter["attributes"][
-                "externalUrl"
-            ] or chapter.chapter_id in flatten(list(self.same_chapter_dict.values())):
-                continue
-
-            # Chapter id is not in the external url
-            path_match = check_chapter_url_same(
-                md_chapter["attributes"]["externalUrl"], chapter.chapter_id
+        if chapter.chapter_id not in self.same_chapter_ids:
+            multi_chapters_list = self.override_options.get("multi_chapters", {}).get(
+                chapter.chapter_id
             )
 
-            if not path_match:
-                continue
+            for md_chapter in self.chapters_on_md:
+                external_url = md_chapter["attributes"]["externalUrl"]
+                if not external_url:
+                    continue
 
-            if chapter.chapter_id in self.override_options.get("multi_chapters", {}):
-                multi_chapters_list = self.override_options.get(
-                    "multi_chapters", {}
-                ).get(chapter.chapter_id, [])
+                # Chapter id is not in the external url
+                if not check_chapter_url_same(external_url, chapter.chapter_id):
+                    continue
 
-                if chapter.chapter_number not in multi_chapters_list:
+                if (
+                    multi_chapters_list is not None
+                    and chapter.chapter_number not in multi_chapters_list
+                ):
                     continue
 
-            chapter.md_chapter_id = md_chapter["id"]
-            on_md = {"md_chapter": md_chapter, "chapter": chapter, "exists": True}
-            return on_md
+                chapter.md_chapter_id = md_chapter["id"]
+                on_md = {"md_chapter": md_chapter, "chapter": chapter, "exists": True}
+                return on_md
         return {"chapter": chapter, "exists": False}
 
     def _check_uploaded_different_id(self, chapter) -> bool:
         """Check if chapter id to upload has been uploaded already under a different
         id."""
-        same_chapter_list_md = [
-            c["attributes"]["externalUrl"] for c in self.chapters_on_md
-        ]
-        same_chapter_list_posted_ids = [
-            str(c.chapter_id) for c in self.posted_md_updates
-        ]
-
-        if chapter.chapter_id in flatten(list(self.same_chapter_dict.values())):
-            master_id = find_key_from_list_value(
-                self.same_chapter_dict, chapter.chapter_id
-            )
-            if master_id is not None:
-                if (
-                    any(
-                        [
-                            re.search(master_id, search)
-                            for search in same_chapter_list_md
-                        ]
-                    )
-                    or master_id in same_chapter_list_posted_ids
-                ):
-                    return True
+        master_id = self.same_chapter_ids.get(chapter.chapter_id)
+        if master_id is not None:
+            if (
+                any(
+                    master_id in md_chapter["attributes"]["externalUrl"]
+                    for md_chapter in self.chapters_on_md
+                    if md_chapter["attributes"]["externalUrl"]
+                )
+                or master_id in self.posted_chapter_ids
+            ):
+                return True
         return False
 
     def edit_chapter(self, dupe_chapter: dict):
@@ -283,10 +273,10 @@ class MangaUploaderProcess:
         )
 
         chapters_to_upload = [
-            chapter
-            for chapter in self.updated_chapters
-            if self._check_for_duplicate_chapter_md_list(chapter)["exists"] is False
-            and not self._check_uploaded_different_id(chapter)
+            dupe["chapter"]
+            for dupe in chapters_dupe_checker
+            if dupe["exists"] is False
+            and not self._check_uploaded_different_id(dupe["chapter"])
         ]
         dupes = [dupe for dupe in chapters_dupe_checker if dupe["exists"] is True]
 
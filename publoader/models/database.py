@@ -1,12 +1,14 @@
+import atexit
+import hashlib
 import logging
 import traceback
-from typing import List, Union
+from typing import Dict, List, Optional, Union
 
 import gridfs
 import pymongo
 from pymongo import DeleteOne, UpdateOne
 
-from publoader.models.dataclasses import Chapter
+from publoader.models.dataclasses import CHAPTER_PROJECTION, Chapter
 from publoader.utils.config import config
 from publoader.utils.singleton import Singleton
 from publoader.utils.utils import EXPIRE_TIME, get_current_datetime
@@ -26,10 +28,30 @@ class DatabaseConnector(metaclass=Singleton):
         client = pymongo.MongoClient(self.database_uri)
         return client
 
+    def close_db(self):
+        """Close the client's connection pool."""
+        self.database.close()
+
 
 database = DatabaseConnector()
+atexit.register(database.close_db)
 database_connection = database.database_connection
 image_filestream = gridfs.GridFS(database_connection, "images")
+# Last reported untracked manga hash of each extension, keyed by extension name
+untracked_manga_hashes: Dict[str, Optional[str]] = {}
+
+
+def create_indexes():
+    """Index the fields the bot and the workers look chapters up by."""
+    database_connection["uploaded"].create_index("extension_name")
+    database_connection["uploaded"].create_index("md_chapter_id")
+    database_connection["uploaded"].create_index("chapter_expire")
+    database_connection["uploaded_ids"].create_index("chapter_id")
+    database_connection["to_delete"].create_index("md_chapter_id")
+    database_connection["to_edit"].create_index("md_chapter_id")
+    database_connection["to_upload"].create_index(
+        [("chapter_id", 1), ("chapter_number", 1), ("chapter_language", 1)]
+    )
 
 
 def convert_model_dict(chapter):
@@ -115,6 +137,62 @@ def update_database(chapter: Union[list, Union[Chapter, dict]], **kwargs):
         return
 
 
+def fetch_posted_chapters(extension_names: List[str]) -> Dict[str, List[Chapter]]:
+    """Get the already uploaded chapters of every extension in a single query."""
+    posted_chapters = {extension_name: [] for extension_name in extension_names}
+    if not extension_names:
+        return posted_chapters
+
+    for data in (
+        database_connection["uploaded"]
+        .find(
+            {"extension_name": {"$in": extension_names}},
+            projection=CHAPTER_PROJECTION,
+        )
+        .batch_size(2000)
+    ):
+        posted_chapters[data["extension_name"]].append(Chapter.from_database(data))
+
+    logger.info("Retrieved posted chapters from database.")
+    return posted_chapters
+
+
+def hash_untracked_manga(manga_ids: List[str]) -> str:
+    """Hash the untracked manga ids, independent of their order."""
+    return hashlib.sha1("\n".join(sorted(manga_ids)).encode()).hexdigest()
+
+
+def check_untracked_manga_changed(
+    extension_name: str, untracked_hash: Optional[str]
+) -> bool:
+    """Check if the untracked manga differ from the ones last reported for the
+    extension. The stored hash is only looked up once per process."""
+    if extension_name not in untracked_manga_hashes:
+        previous = database_connection["untracked_manga"].find_one(
+            {"_id": {"$eq": extension_name}}
+        )
+        untracked_manga_hashes[extension_name] = (
+            None if previous is None else previous.get("untracked_hash")
+        )
+    return untracked_manga_hashes[extension_name] != untracked_hash
+
+
+def store_untracked_manga_hash(extension_name: str, untracked_hash: Optional[str]):
+    """Store the untracked manga once they've been reported, or forget them once
+    the extension has none left."""
+    if untracked_hash is None:
+        database_connection["untracked_manga"].delete_one(
+            {"_id": {"$eq": extension_name}}
+        )
+    else:
+        database_connection["untracked_manga"].update_one(
+            {"_id": {"$eq": extension_name}},
+            {"$set": {"untracked_hash": untracked_hash}},
+            upsert=True,
+        )
+    untracked_manga_hashes[extension_name] = untracked_hash
+
+
 def update_expired_chapter_database(
     extension_name: str,
     md_manga_id: str,
@@ -137,20 +215,20 @@ def update_expired_chapter_database(
         logger.info(f"No chapters specified to update expired.")
         return
 
-    if isinstance(chapter, Chapter):
-        chapter = vars(chapter)
-
-    chapters = [chapter]
-
-    if isinstance(chapter, list):
-        chapters = list(map(convert_model_dict, chapter))
+    if not isinstance(chapter, list):
+        chapter = [chapter]
 
     if isinstance(md_chapter, dict):
         md_chapter = [md_chapter]
 
-    for chap in chapters:
+    # Mark the chapters as expired in the same pass that converts them, the
+    # model dict is updated in place rather than rebuilt into a new Chapter.
+    chapters = []
+    for chap in chapter:
+        chap = convert_model_dict(chap)
         chap["chapter_expire"] = EXPIRE_TIME
         chap["extension_name"] = extension_name
+        chapters.append(chap)
 
     if isinstance(md_chapter, list):
         chapters.extend(
@@ -1,5 +1,6 @@
+from dataclasses import MISSING, Field, fields
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Callable, List, Optional
 
 from pydantic.dataclasses import dataclass
 
@@ -49,3 +50,30 @@ class Chapter:
 
     def __eq__(self, other):
         return self.__hash__() == other.__hash__()
+
+    @classmethod
+    def from_database(cls, data: dict) -> "Chapter":
+        """Make a chapter from a database document without validating it again.
+        Documents are stored from already validated chapters, extra keys are ignored."""
+        chapter = cls.__new__(cls)
+        for field_name, default in CHAPTER_FIELD_DEFAULTS:
+            value = data[field_name] if field_name in data else default()
+            object.__setattr__(chapter, field_name, value)
+        return chapter
+
+
+def _field_default(field: Field) -> Callable[[], Any]:
+    """Get a callable returning the field's declared default."""
+    if field.default is not MISSING:
+        return lambda: field.default
+    if field.default_factory is not MISSING:
+        return field.default_factory
+    return lambda: None
+
+
+CHAPTER_FIELDS = tuple(field.name for field in fields(Chapter))
+# Older documents may be missing newer fields, those get the declared default
+CHAPTER_FIELD_DEFAULTS = tuple(
+    (field.name, _field_default(field)) for field in fields(Chapter)
+)
+CHAPTER_PROJECTION = {"_id": 0, **{field_name: 1 for field_name in CHAPTER_FIELDS}}
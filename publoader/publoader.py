@@ -1,6 +1,9 @@
 import argparse
 import logging
+import operator
+import sys
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 
 import requests
@@ -17,64 +20,89 @@ from publoader.load_extensions import (
     load_extensions,
     run_extensions,
 )
-from publoader.utils.config import config, resources_path
+from publoader.utils.config import config, max_extension_workers, resources_path
 from publoader.models.database import (
-    database_connection,
+    check_untracked_manga_changed,
+    create_indexes,
+    fetch_posted_chapters,
+    hash_untracked_manga,
+    store_untracked_manga_hash,
 )
 from publoader.models.dataclasses import Chapter
-from publoader.utils.utils import get_current_datetime, open_manga_data
+from publoader.utils.utils import batched, get_current_datetime, open_manga_data
 
 logger = logging.getLogger("publoader")
 
 
-def send_untracked_manga_webhook(extension_name, untracked_manga):
+def send_untracked_manga_webhook(extension_name, untracked_manga) -> bool:
+    """Report the untracked manga, returning whether every message was sent."""
     logger.info(
         f"Found {len(untracked_manga)} untracked manga for {extension_name}: {untracked_manga}."
     )
     for untracked in untracked_manga:
         print(f"Found untracked manga {untracked.manga_id}: {untracked.manga_name}")
 
-    if untracked_manga:
-        split_series = [
-            untracked_manga[elem : elem + 30]
-            for elem in range(0, len(untracked_manga), 30)
-        ]
-
-        for count, series_list in enumerate(split_series, start=1):
-            PubloaderWebhook(
-                extension_name=extension_name,
-                title=f"{len(untracked_manga)} Untracked Manga"
-                + (f" ({count})" if count > 1 else ""),
-                description="\n".join(
-                    [
-                        f"**{manga.manga_name}**: [{manga.manga_id}]({manga.manga_url})"
-                        for manga in series_list
-                    ]
-                ),
-                footer={"text": f"extensions.{extension_name}"},
-            ).send()
+    sent = True
+    for count, series_list in enumerate(batched(untracked_manga, 30), start=1):
+        sent &= PubloaderWebhook(
+            extension_name=extension_name,
+            title=f"{len(untracked_manga)} Untracked Manga"
+            + (f" ({count})" if count > 1 else ""),
+            description="\n".join(
+                f"**{manga.manga_name}**: [{manga.manga_id}]({manga.manga_url})"
+                for manga in series_list
+            ),
+            footer={"text": f"extensions.{extension_name}"},
+        ).send(sync=True)
+    return sent
+
+
+extension_data_getter = operator.itemgetter(
+    "name",
+    "normalised_extension_name",
+    "updated_chapters",
+    "all_chapters",
+    "untracked_manga",
+    "tracked_mangadex_ids",
+    "mangadex_group_id",
+    "override_options",
+    "extension_languages",
+    "clean_db",
+)
 
 
 def run_updates(
     extension_data: dict,
     manga_data_local: dict,
+    posted_chapters_data: List[Chapter],
 ):
     logger.info(f"Getting updates for {extension_data['name']}")
 
-    extension = extension_data["extension"]
-    extension_name = extension_data["name"]
-    normalised_extension_name = extension_data["normalised_extension_name"]
-    updated_chapters = extension_data["updated_chapters"]
-    all_chapters = extension_data["all_chapters"]
-    untracked_manga = extension_data["untracked_manga"]
-    tracked_mangadex_ids = extension_data["tracked_mangadex_ids"]
-    mangadex_group_id = extension_data["mangadex_group_id"]
-    override_options = extension_data["override_options"]
-    extension_languages = extension_data["extension_languages"]
-    clean_db = extension_data["clean_db"]
+    (
+        extension_name,
+        normalised_extension_name,
+        updated_chapters,
+        all_chapters,
+        untracked_manga,
+        tracked_mangadex_ids,
+        mangadex_group_id,
+        override_options,
+        extension_languages,
+        clean_db,
+    ) = extension_data_getter(extension_data)
 
     try:
-        send_untracked_manga_webhook(extension_name, untracked_manga)
+        # Only report the untracked manga again when they've changed, and only
+        # remember them once the report went through.
+        if untracked_manga:
+            untracked_hash = hash_untracked_manga(
+                [manga.manga_id for manga in untracked_manga]
+            )
+            if check_untracked_manga_changed(extension_name, untracked_hash):
+                if send_untracked_manga_webhook(extension_name, untracked_manga):
+                    store_untracked_manga_hash(extension_name, untracked_hash)
+        elif check_untracked_manga_changed(extension_name, None):
+            store_untracked_manga_hash(extension_name, None)
 
         if not updated_chapters:
             print(f"No new updates found for {normalised_extension_name}")
@@ -84,17 +112,27 @@ def run_updates(
             ).send()
             return False
 
-        updated_chapters[:] = [x for x in updated_chapters if x.md_manga_id]
+        # Drop the chapters without a MangaDex id in place, updating the kept
+        # chapters in the same pass.
+        kept = 0
+        found_messages = []
         for update in updated_chapters:
-            print(
+            if not update.md_manga_id:
+                continue
+
+            found_messages.append(
                 f"--Found manga {update.manga_name} - {update.manga_id}, "
                 f"chapter_id: {update.chapter_id}, "
                 f"chapter: {update.chapter_number!r}, "
                 f"language: {update.chapter_language!r}, "
-                f"title: {update.chapter_title!r}."
+                f"title: {update.chapter_title!r}.\n"
             )
             update.extension_name = extension_name
             update.chapter_lookup = get_current_datetime()
+            updated_chapters[kept] = update
+            kept += 1
+        del updated_chapters[kept:]
+        sys.stdout.write("".join(found_messages))
 
         print(f"Found {len(updated_chapters)} chapters for {normalised_extension_name}")
         PubloaderWebhook(
@@ -102,16 +140,6 @@ def run_updates(
             title=f"Found {len(updated_chapters)} chapters for {normalised_extension_name}",
         ).send()
 
-        # Get already posted chapters for the extension
-        posted_chapters_data = list(
-            database_connection["uploaded"].find(
-                {"extension_name": {"$eq": extension_name}}
-            )
-        )
-
-        posted_chapters_data = [Chapter(**data) for data in posted_chapters_data]
-        logger.info("Retrieved posted chapters from database.")
-
         ExtensionUploader(
             config=config,
             extension=extension_data,
@@ -136,7 +164,7 @@ def run_updates(
             mangadex_manga_ids_for_dupe_remove = tracked_mangadex_ids
         else:
             mangadex_manga_ids_for_dupe_remove = (
-                [x.md_manga_id for x in updated_chapters]
+                list(dict.fromkeys(x.md_manga_id for x in updated_chapters))
                 if updated_chapters
                 else tracked_mangadex_ids
             )
@@ -160,7 +188,7 @@ def run_updates(
             title=f"Error in {normalised_extension_name}",
             description=f"An exception occurred:\n```\n{str(e)}\n```",
             colour="FF0000",
-        ).send()
+        ).send(sync=True)
 
         return False
 
@@ -186,11 +214,35 @@ def open_extensions(
         manga_data_local = open_manga_data(
             resources_path.joinpath(config["Paths"]["manga_data_path"])
         )
-        for site in extensions:
-            run_updates(
-                extensions[site],
-                manga_data_local=manga_data_local,
-            )
+
+        # Get already posted chapters for the extensions with updates
+        posted_chapters = fetch_posted_chapters(
+            [
+                extension_data["name"]
+                for extension_data in extensions.values()
+                if extension_data["updated_chapters"]
+            ]
+        )
+
+        # Each extension's updates are independent and bound by MangaDex/Mongo
+        # latency, so they are run concurrently on a pool shared by all of them.
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(len(extensions), max_extension_workers)),
+            thread_name_prefix="publoader-extension",
+        ) as executor:
+            futures = [
+                executor.submit(
+                    run_updates,
+                    extension_data,
+                    manga_data_local=manga_data_local,
+                    posted_chapters_data=posted_chapters.get(
+                        extension_data["name"], []
+                    ),
+                )
+                for extension_data in extensions.values()
+            ]
+            for future in futures:
+                future.result()
     except BaseException as e:
         traceback.print_exc()
         logger.exception(f"Error raised.")
@@ -199,11 +251,11 @@ def open_extensions(
             title="Critial Run Error",
             description=str(e),
             colour="FF0000",
-        ).send()
+        ).send(sync=True)
 
 
-if __name__ == "__main__":
-    parser = argparse.ArgumentParser()
+def add_run_arguments(parser: argparse.ArgumentParser) -> argparse.ArgumentParser:
+    """Add the arguments shared by the bot and the scheduler."""
     parser.add_argument(
         "--clean",
         "-c",
@@ -227,10 +279,16 @@ if __name__ == "__main__":
         required=False,
         help="Run a specific extension.",
     )
+    return parser
+
+
+if __name__ == "__main__":
+    parser = add_run_arguments(argparse.ArgumentParser())
 
     vargs = vars(parser.parse_args())
 
     try:
+        create_indexes()
         worker.main(restart_threads=False)
 
         if vargs["extension"] is None:
@@ -1,13 +1,19 @@
-import json
 import logging
+import os
 import shutil
-import time
-from pathlib import Path
+import tarfile
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path, PurePosixPath
+from typing import Optional
 
 import github
+import orjson
 import requests
 from github import Github
-from github.Commit import Commit
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from publoader.utils.config import config, resources_path
 from publoader.utils.utils import root_path
@@ -24,12 +30,36 @@ class PubloaderUpdater:
 
         self.commits_file = resources_path.joinpath(config["Paths"]["commits_path"])
         self.github = Github(config["Repo"]["github_access_token"])
+        self.session = requests.Session()
+        self.session.mount(
+            "https://",
+            HTTPAdapter(
+                pool_connections=8,
+                pool_maxsize=16,
+                # GitHub signals secondary rate limits with a 403, so back off
+                # on it as well as on 429s.
+                max_retries=Retry(
+                    total=3,
+                    backoff_factor=0.5,
+                    status_forcelist=[403, 429, 502, 503, 504],
+                    respect_retry_after_header=True,
+                ),
+            ),
+        )
+        # Sent with every request so raw downloads from private repos don't
+        # need the token baked into the url.
+        github_access_token = config["Repo"]["github_access_token"]
+        if github_access_token:
+            self.session.headers["Authorization"] = f"token {github_access_token}"
+        self.download_workers = 8
         self.local_commits = self._open_commits()
         self.latest_commit_sha = self.local_commits.get("base_repo")
         self.latest_extension_sha = self.local_commits.get("extension_repo")
         self.latest_extension_private_sha = self.local_commits.get(
             "extension_private_repo"
         )
+        self.file_etags = dict(self.local_commits.get("etags", {}))
+        self.commit_etags = dict(self.local_commits.get("commit_etags", {}))
 
         self.repo_owner = config["Repo"]["repo_owner"]
         self.base_repo = config["Repo"]["base_repo_path"]
@@ -42,10 +72,8 @@ class PubloaderUpdater:
     def _open_commits(self):
         """Open the commits file."""
         try:
-            with open(self.commits_file, "r") as login_file:
-                token = json.load(login_file)
-            return token
-        except (FileNotFoundError, json.JSONDecodeError):
+            return orjson.loads(self.commits_file.read_bytes())
+        except (FileNotFoundError, orjson.JSONDecodeError):
             return {}
 
     def _save_commits(self, data=None):
@@ -55,15 +83,63 @@ class PubloaderUpdater:
                 "base_repo": self.latest_commit_sha,
                 "extension_repo": self.latest_extension_sha,
                 "extension_private_repo": self.latest_extension_private_sha,
+                "etags": self.file_etags,
+                "commit_etags": self.commit_etags,
             }
 
-        with open(self.commits_file, "w") as login_file:
-            login_file.write(json.dumps(data, indent=4))
+        if data == self.local_commits:
+            return
+
+        # Write to a temp file first so a crash can't leave a truncated file
+        temp_commits_file = self.commits_file.with_suffix(".tmp")
+        temp_commits_file.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        os.replace(temp_commits_file, self.commits_file)
+        self.local_commits = data
+
+    def _get_api_headers(self):
+        return {"Accept": "application/vnd.github+json"}
+
+    def _get_latest_commit(self, repo_name) -> Optional[str]:
+        """Get the sha of the latest commit on the repo. A conditional request
+        is used so unchanged repos don't count against the rate limit."""
+        commits_url = (
+            f"https://api.github.com/repos/{self.repo_owner}/{repo_name}/commits"
+        )
+        headers = self._get_api_headers()
+        cached_etag, cached_sha = self.commit_etags.get(commits_url, (None, None))
+        if cached_etag is not None:
+            headers["If-None-Match"] = cached_etag
+
+        try:
+            response = self.session.get(
+                commits_url, params={"per_page": 1}, headers=headers, timeout=30
+            )
+        except requests.RequestException as e:
+            logger.error(e)
+            return
+
+        if response.status_code == 304:
+            return cached_sha
+
+        if response.status_code != 200:
+            logger.error(
+                f"Fetching the latest commit of {repo_name} returned {response.status_code}"
+            )
+            return
+
+        try:
+            latest_commit_sha = response.json()[0]["sha"]
+        except (ValueError, IndexError, KeyError):
+            logger.error(f"Couldn't read the latest commit of {repo_name}")
+            return
 
-    def _get_latest_commit(self, repo):
-        commits = repo.get_commits()
-        latest_commit: Commit = commits[0]
-        return latest_commit
+        if "ETag" in response.headers:
+            # A list, as that's what the json commits file loads it back as
+            self.commit_etags[commits_url] = [
+                response.headers["ETag"],
+                latest_commit_sha,
+            ]
+        return latest_commit_sha
 
     def download_file(self, root_path, content_data):
         file_name = content_data.name
@@ -75,64 +151,161 @@ class PubloaderUpdater:
         download_url = content_data.download_url
         logger.info(f"Downloading file {file_path}, link: {download_url}")
 
-        response = requests.get(download_url)
+        # Only ask for changes if the file being updated is still present
+        etag_key = file_path.relative_to(self.update_path).as_posix()
+        headers = {}
+        if etag_key in self.file_etags and self.root_path.joinpath(etag_key).exists():
+            headers["If-None-Match"] = self.file_etags[etag_key]
 
-        if response.status_code == 200:
-            content = response.content
-            file_path.write_bytes(content)
-            return False
-        return True
-
-    def download_content(self, repo, root_path, current_path, failed_download=False):
-        logger.info(
-            f"Contents path {repo=}, {root_path=}, {current_path=}, {failed_download=}"
-        )
+        try:
+            with self.session.get(
+                download_url, headers=headers, stream=True, timeout=30
+            ) as response:
+                if response.status_code == 304:
+                    logger.info(f"File {file_path} is unchanged, skipping.")
+                    return False
+
+                if response.status_code != 200:
+                    return True
+
+                if "ETag" in response.headers:
+                    self.file_etags[etag_key] = response.headers["ETag"]
+
+                response.raw.decode_content = True
+                with open(file_path, "wb") as file_fp:
+                    shutil.copyfileobj(response.raw, file_fp, length=1024 * 1024)
+        except requests.RequestException as e:
+            logger.error(e)
+            return True
+        return False
+
+    def download_content(self, repo, root_path, current_path):
+        logger.info(f"Contents path {repo=}, {root_path=}, {current_path=}")
 
         root_path.mkdir(parents=True, exist_ok=True)
 
-        all_content = repo.get_contents(current_path)
-        root_files = [file for file in all_content if file.type == "file"]
-        directories = [direc for direc in all_content if direc.type == "dir"]
+        # Walk the tree breadth first on the pool, so directory listings are
+        # fetched while the files already found are downloading.
+        with ThreadPoolExecutor(max_workers=self.download_workers) as executor:
+            listings = deque([executor.submit(repo.get_contents, current_path)])
+            downloads = []
+            while listings:
+                for content in listings.popleft().result():
+                    if content.type == "dir":
+                        listings.append(
+                            executor.submit(repo.get_contents, content.path)
+                        )
+                    elif content.type == "file":
+                        downloads.append(
+                            executor.submit(self.download_file, root_path, content)
+                        )
+
+            failed_downloads = [download.result() for download in downloads]
+
+        return any(failed_downloads)
+
+    def download_tarball(self, repo_name, commit_sha, root_path) -> Optional[bool]:
+        """Download the repo at the commit as a single tarball and extract it.
+        Returns None if the tarball isn't available."""
+        tarball_url = (
+            f"https://api.github.com/repos/{self.repo_owner}/{repo_name}"
+            f"/tarball/{commit_sha}"
+        )
+        logger.info(f"Downloading tarball {tarball_url}")
+        try:
+            response = self.session.get(
+                tarball_url, headers=self._get_api_headers(), stream=True, timeout=30
+            )
+        except requests.RequestException as e:
+            logger.error(e)
+            return
 
-        for file in root_files:
-            failed_download = self.download_file(root_path, file)
-            time.sleep(2)
+        with response:
+            if response.status_code != 200:
+                logger.warning(
+                    f"Tarball download returned {response.status_code} for {repo_name}"
+                )
+                return
+
+            # Extract next to the update, so a failure part-way through doesn't
+            # leave half the repo in it. The base repo's folder holds the
+            # extension repos' folder, so only this download is removed.
+            staging_path = Path(tempfile.mkdtemp(dir=self.update_path))
+            try:
+                with tarfile.open(fileobj=response.raw, mode="r|gz") as tarball:
+                    for member in tarball:
+                        # Drop the owner-repo-sha folder GitHub wraps the repo in
+                        member_path = PurePosixPath(
+                            *PurePosixPath(member.name).parts[1:]
+                        )
+                        if not member_path.parts:
+                            continue
+
+                        member.name = str(member_path)
+                        self._extract_member(tarball, member, staging_path)
+            except (tarfile.TarError, requests.RequestException) as e:
+                logger.error(e)
+                shutil.rmtree(staging_path, ignore_errors=True)
+                return True
 
-        for direc in directories:
-            self.download_content(
-                repo=repo,
-                root_path=root_path,
-                current_path=direc.path,
-                failed_download=failed_download,
-            )
-            time.sleep(4)
+        shutil.copytree(
+            staging_path, root_path, copy_function=shutil.move, dirs_exist_ok=True
+        )
+        shutil.rmtree(staging_path, ignore_errors=True)
+        return False
+
+    def _extract_member(self, tarball, member, root_path):
+        """Extract a tarball member, skipping ones that would land outside the
+        update folder."""
+        if hasattr(tarfile, "data_filter"):
+            try:
+                tarball.extract(member, root_path, filter="data")
+            except tarfile.FilterError as e:
+                logger.warning(f"Skipping tarball member {member.name}: {e}")
+            return
 
-        return failed_download
+        # Python versions without extraction filters
+        member_path = PurePosixPath(member.name)
+        if (
+            member_path.is_absolute()
+            or ".." in member_path.parts
+            or not (member.isfile() or member.isdir())
+        ):
+            logger.warning(f"Skipping tarball member {member.name}")
+            return
+        tarball.extract(member, root_path)
 
     def fetch_repo(self, repo_name, commit_sha_var, download_path):
-        try:
-            repo = self.github.get_repo(f"{self.repo_owner}/{repo_name}")
-        except github.UnknownObjectException:
-            logger.exception(f"Error fetching repo {repo_name}")
-            return False, commit_sha_var
+        logger.info(f"Checking for update in: {self.repo_owner}/{repo_name}")
 
-        logger.info(f"Checking for update in: {repo}")
+        latest_remote_commit_sha = self._get_latest_commit(repo_name)
+        if latest_remote_commit_sha is None:
+            return False, commit_sha_var
 
-        latest_remote_commit = self._get_latest_commit(repo)
-        if commit_sha_var is not None and commit_sha_var == latest_remote_commit.sha:
+        if commit_sha_var is not None and commit_sha_var == latest_remote_commit_sha:
             logger.info(
-                f"No new commit, not updating. Latest commit: {latest_remote_commit.sha}"
+                f"No new commit, not updating. Latest commit: {latest_remote_commit_sha}"
             )
             return False, commit_sha_var
 
-        logger.info(f"Update found, downloading {latest_remote_commit.sha}")
+        logger.info(f"Update found, downloading {latest_remote_commit_sha}")
         PubloaderWebhook(
             extension_name=None,
             title=f"Update found for repo {repo_name}",
-            description=f"SHA: `{latest_remote_commit.sha}`",
+            description=f"SHA: `{latest_remote_commit_sha}`",
         ).main()
-        failed_download = self.download_content(repo, download_path, "")
-        return failed_download, latest_remote_commit.sha
+        failed_download = self.download_tarball(
+            repo_name, latest_remote_commit_sha, download_path
+        )
+        if failed_download is None:
+            try:
+                repo = self.github.get_repo(f"{self.repo_owner}/{repo_name}")
+            except github.UnknownObjectException:
+                logger.exception(f"Error fetching repo {repo_name}")
+                return False, commit_sha_var
+
+            failed_download = self.download_content(repo, download_path, "")
+        return failed_download, latest_remote_commit_sha
 
     def move_files(self):
         shutil.copytree(
@@ -143,15 +316,7 @@ class PubloaderUpdater:
         )
         shutil.rmtree(self.update_path, ignore_errors=True)
 
-    def update(self):
-        print(f"Looking for new updates.")
-        extensions_path = self.update_path.joinpath(self.extensions_path)
-
-        base_repo_failed, self.latest_commit_sha = self.fetch_repo(
-            self.base_repo, self.latest_commit_sha, self.update_path
-        )
-
-        time.sleep(8)
+    def _fetch_extension_repos(self, extensions_path):
         extensions_private_repo_failed = False
 
         if self.extensions_private_repo is not None:
@@ -164,11 +329,33 @@ class PubloaderUpdater:
                 extensions_path,
             )
 
-            time.sleep(8)
-
         extensions_repo_failed, self.latest_extension_sha = self.fetch_repo(
             self.extensions_repo, self.latest_extension_sha, extensions_path
         )
+        return extensions_private_repo_failed, extensions_repo_failed
+
+    def update(self):
+        print(f"Looking for new updates.")
+        extensions_path = self.update_path.joinpath(self.extensions_path)
+
+        # The base and extension repos are independent, check them at the same
+        # time. The extension repos share a folder so stay in order.
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            base_repo_future = executor.submit(
+                self.fetch_repo,
+                self.base_repo,
+                self.latest_commit_sha,
+                self.update_path,
+            )
+            extension_repos_future = executor.submit(
+                self._fetch_extension_repos, extensions_path
+            )
+
+            base_repo_failed, self.latest_commit_sha = base_repo_future.result()
+            (
+                extensions_private_repo_failed,
+                extensions_repo_failed,
+            ) = extension_repos_future.result()
 
         if base_repo_failed or extensions_private_repo_failed or extensions_repo_failed:
             logger.warning(f"Downloading new repo update failed, not updating.")
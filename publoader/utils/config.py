@@ -2,6 +2,7 @@ import configparser
 import logging
 from calendar import WEDNESDAY
 from datetime import time
+from typing import Optional
 
 from publoader.utils.utils import root_path
 
@@ -52,7 +53,8 @@ def open_config_file() -> configparser.RawConfigParser:
     # Open config file and read values
     if config_file_path.exists():
         config = configparser.RawConfigParser()
-        config.read(config_file_path)
+        with open(config_file_path, encoding="utf-8") as config_file:
+            config.read_file(config_file)
         logger.info("Loaded config file.")
     else:
         logger.critical("Config file not found, exiting.")
@@ -72,56 +74,31 @@ mangadex_auth_url = config["Paths"]["mangadex_auth_url"]
 md_upload_api_url = f"{mangadex_api_url}/upload"
 
 
-try:
-    ratelimit_time = int(config["Options"].get("mangadex_ratelimit_time", ""))
-except (ValueError, KeyError):
-    ratelimit_time = 2
-
-
-try:
-    upload_retry = int(config["Options"].get("upload_retry", ""))
-except (ValueError, KeyError):
-    upload_retry = 3
-
-try:
-    max_requests = int(config["Options"].get("max_requests", ""))
-except (ValueError, KeyError):
-    max_requests = 5
-
-
-try:
-    max_log_days = int(config["Options"].get("max_log_days", ""))
-except (ValueError, KeyError):
-    max_log_days = 30
-
-
-try:
-    daily_run_time_daily_hour = int(
-        config["Options"].get("bot_run_time_daily", "").split(":")[0]
-    )
-except (ValueError, KeyError):
-    daily_run_time_daily_hour = 15
-
-try:
-    daily_run_time_daily_minute = int(
-        config["Options"].get("bot_run_time_daily", "").split(":")[1]
-    )
-except (ValueError, KeyError):
-    daily_run_time_daily_minute = 0
-
-try:
-    daily_run_time_checks_hour = int(
-        config["Options"].get("bot_run_time_checks", "").split(":")[0]
-    )
-except (ValueError, KeyError):
-    daily_run_time_checks_hour = 1
-
-try:
-    daily_run_time_checks_minute = int(
-        config["Options"].get("bot_run_time_checks", "").split(":")[1]
-    )
-except (ValueError, KeyError):
-    daily_run_time_checks_minute = 0
+def get_int_option(option: str, default: int, time_index: Optional[int] = None) -> int:
+    """Read an integer option, falling back to the default if it isn't set. Time
+    options are split on ':' and the time_index part is used."""
+    try:
+        value = config["Options"].get(option, "")
+        if time_index is not None:
+            value = value.split(":")[time_index]
+        return int(value)
+    except (ValueError, KeyError, IndexError):
+        return default
+
+
+ratelimit_time = get_int_option("mangadex_ratelimit_time", 2)
+upload_retry = get_int_option("upload_retry", 3)
+max_requests = get_int_option("max_requests", 5)
+max_log_days = get_int_option("max_log_days", 30)
+max_extension_workers = get_int_option("max_extension_workers", 4)
+delete_batch_size = get_int_option("delete_batch_size", 100)
+stream_batch_size = get_int_option("stream_batch_size", 500)
+stream_max_await_ms = get_int_option("stream_max_await_ms", 500)
+
+daily_run_time_daily_hour = get_int_option("bot_run_time_daily", 15, time_index=0)
+daily_run_time_daily_minute = get_int_option("bot_run_time_daily", 0, time_index=1)
+daily_run_time_checks_hour = get_int_option("bot_run_time_checks", 1, time_index=0)
+daily_run_time_checks_minute = get_int_option("bot_run_time_checks", 0, time_index=1)
 
 DEFAULT_TIME = time(hour=daily_run_time_daily_hour, minute=daily_run_time_daily_minute)
 CLEAN_TIME = time(hour=daily_run_time_checks_hour, minute=daily_run_time_checks_minute)
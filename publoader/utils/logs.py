@@ -1,22 +1,39 @@
+import functools
 import logging
-from datetime import date, datetime, timedelta
+import os
+from datetime import date, datetime, time, timedelta
 from pathlib import Path
+from typing import Iterator, Union
 
 from publoader.utils.config import max_log_days
 from publoader.utils.utils import root_path
 
-logs_root_path = root_path.joinpath("logs")
-logs_root_path.mkdir(parents=True, exist_ok=True)
+log_formatter = logging.Formatter(
+    "%(asctime)s %(levelname)-8s [%(filename)s:%(funcName)s:%(lineno)d] %(message)s"
+)
+
+
+@functools.lru_cache(maxsize=None)
+def create_log_dir(path: Path) -> Path:
+    """Create the log folder, once per path."""
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+logs_root_path = create_log_dir(root_path.joinpath("logs"))
 
 
 def format_log_dir_path(directory_name: str):
-    log_folder_path = logs_root_path.joinpath(directory_name)
-    log_folder_path.mkdir(parents=True, exist_ok=True)
-    return log_folder_path
+    return create_log_dir(logs_root_path.joinpath(directory_name))
 
 
 current_date = date.today()
 last_date_keep_logs = current_date - timedelta(days=max_log_days)
+# Start of day timestamps to compare log file mtimes against
+current_date_timestamp = datetime.combine(current_date, time.min).timestamp()
+last_date_keep_logs_timestamp = datetime.combine(
+    last_date_keep_logs, time.min
+).timestamp()
 
 bot_logs_folder_path = format_log_dir_path("bot")
 worker_logs_folder_path = format_log_dir_path("workers")
@@ -31,7 +48,7 @@ def setup_logs(
     logger_filename: str = None,
 ):
     """Setup the logger with the specified name."""
-    path.mkdir(exist_ok=True, parents=True)
+    create_log_dir(path)
     if logger_filename is None:
         logger_filename = logger_name
 
@@ -39,10 +56,7 @@ def setup_logs(
 
     logs_path = path.joinpath(filename)
     fileh = logging.FileHandler(logs_path, "a")
-    formatter = logging.Formatter(
-        "%(asctime)s %(levelname)-8s [%(filename)s:%(funcName)s:%(lineno)d] %(message)s"
-    )
-    fileh.setFormatter(formatter)
+    fileh.setFormatter(log_formatter)
 
     log = logging.getLogger(logger_name)  # root logger
     for hdlr in log.handlers[:]:  # remove all old handlers
@@ -90,17 +104,31 @@ setup_logs("publoader-deleter", worker_logs_folder_path.joinpath("deleter"))
 _logger = logging.getLogger("publoader")
 
 
+def _iter_log_files(folder_path: Union[Path, str]) -> Iterator[os.DirEntry]:
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _iter_log_files(entry.path)
+            elif entry.name.endswith(".log"):
+                yield entry
+
+
 def clear_old_logs(folder_path: Path):
-    for log_file in folder_path.rglob("*.log"):
-        if log_file.stat().st_size < 0:
+    for log_file in _iter_log_files(folder_path):
+        log_file_stat = log_file.stat()
+
+        # Today's logs are created empty when the loggers are set up
+        if (
+            log_file_stat.st_size == 0
+            and log_file_stat.st_mtime < current_date_timestamp
+        ):
             _logger.debug(f"{log_file.name} is empty, deleting.")
-            log_file.unlink()
+            os.unlink(log_file.path)
             continue
 
-        file_date = datetime.fromtimestamp(log_file.stat().st_mtime).date()
-        if file_date < last_date_keep_logs:
+        if log_file_stat.st_mtime < last_date_keep_logs_timestamp:
             _logger.debug(f"{log_file.name} is over {max_log_days} days old, deleting.")
-            log_file.unlink()
+            os.unlink(log_file.path)
 
 
 clear_old_logs(logs_root_path)
@@ -1,41 +1,53 @@
 import asyncio
+import itertools
 import logging
 import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
 from urllib.parse import urlparse
 
 from publoader.http import http_client
 from publoader.http.properties import RequestError
-from publoader.utils.config import mangadex_api_url, upload_retry
+from publoader.utils.config import mangadex_api_url, max_requests, upload_retry
 
 logger = logging.getLogger("publoader")
 
+# Aggregate responses are reused for a short while, so extensions sharing a
+# manga in the same run don't refetch it.
+aggregate_cache: Dict[tuple, tuple] = {}
+aggregate_cache_lock = threading.Lock()
+aggregate_cache_size = 1024
+aggregate_cache_ttl = 60
+# Event loop for each thread that isn't already running one
+event_loops = threading.local()
+# One page fetching pool per process, shared by every get_md_api caller
+page_executor: Optional[ThreadPoolExecutor] = None
+page_executor_pid: Optional[int] = None
+page_executor_lock = threading.Lock()
+
+
+def _get_page_executor() -> ThreadPoolExecutor:
+    """Get the process's page fetching pool, a forked process makes its own."""
+    global page_executor, page_executor_pid
+
+    with page_executor_lock:
+        if page_executor is None or page_executor_pid != os.getpid():
+            page_executor = ThreadPoolExecutor(
+                max_workers=max(1, max_requests), thread_name_prefix="md-pages"
+            )
+            page_executor_pid = os.getpid()
+        return page_executor
 
-def get_md_api(route: str, **params: dict) -> List[dict]:
-    """Go through each page in the api to get all the chapters/manga."""
-    chapters = []
-    limit = 100
-    offset = 0
-    iteration = 0
-    retry = 0
-    created_at_since_time = "2000-01-01T00:00:00"
-
-    parameters = {}
-    parameters.update(params)
-
-    while retry < upload_retry:
-        # Update the parameters with the new offset
-        parameters.update(
-            {
-                "limit": limit,
-                "offset": offset,
-                "createdAtSince": created_at_since_time,
-            }
-        )
 
-        logger.debug(f"Request parameters: {parameters}")
+def _fetch_md_api_page(route: str, parameters: dict) -> Optional[dict]:
+    """Fetch a single page of the api, retrying if it fails."""
+    logger.debug("Request parameters: %s", parameters)
 
+    for _ in range(upload_retry):
         # Call the api and get the json data
         try:
             chapters_response = http_client.get(
@@ -43,82 +55,117 @@ def get_md_api(route: str, **params: dict) -> List[dict]:
             )
         except RequestError as e:
             logger.error(e)
-            retry += 1
             continue
 
         if chapters_response.status_code != 200:
             manga_response_message = f"Couldn't get the {route}s of the group."
             logger.error(manga_response_message)
-            retry += 1
             continue
 
         if chapters_response.data is None:
             logger.warning(f"Couldn't convert {route}s data into json, retrying.")
-            retry += 1
             continue
 
-        chapters.extend(chapters_response.data["data"])
-        offset += limit
-
-        if iteration == 0:
-            # Finds how many pages needed to be called
-            pages = math.ceil(chapters_response.data.get("total", 0) / limit)
-            logger.debug(f"{pages} page(s) for group {route}s.")
-
-        # End the loop when all the pages have been gone through
-        # Offset 10000 is the highest you can go, reset offset and get next
-        # 10k batch using the last available chapter's created at date
-        if (
-            len(chapters_response.data["data"]) == 0
-            or not chapters_response.data["data"]
-        ):
+        return chapters_response.data
+
+
+def get_md_api(route: str, **params: dict) -> List[dict]:
+    """Go through each page in the api to get all the chapters/manga."""
+    chapters = []
+    limit = 100
+    created_at_since_time = "2000-01-01T00:00:00"
+
+    while True:
+        parameters = {
+            **params,
+            "limit": limit,
+            "offset": 0,
+            "createdAtSince": created_at_since_time,
+        }
+
+        first_page = _fetch_md_api_page(route, parameters)
+        if first_page is None or not first_page["data"]:
             break
 
-        if offset >= 10000:
-            logger.debug(f"Reached 10k {route}s, looping over next 10k.")
-            created_at_since_time = chapters[-1]["attributes"]["createdAt"].split("+")[
-                0
-            ]
-            offset = 0
-            retry = 0
-            iteration = 0
-            continue
+        chapters.extend(first_page["data"])
+
+        # Finds how many pages needed to be called
+        # Offset 10000 is the highest you can go, pages past it are fetched in
+        # the next 10k batch
+        total = first_page.get("total", 0)
+        pages = math.ceil(min(total, 10000) / limit)
+        logger.debug("%s page(s) for group %ss.", pages, route)
+
+        # The page count is known after the first page, fetch the rest on the
+        # shared pool so nested callers don't multiply the threads
+        finished = False
+        if pages > 1:
+            remaining_pages = _get_page_executor().map(
+                lambda offset: _fetch_md_api_page(
+                    route, {**parameters, "offset": offset}
+                ),
+                range(limit, pages * limit, limit),
+            )
+
+            for page in remaining_pages:
+                # End the loop when a page couldn't be fetched or is empty
+                if page is None or not page["data"]:
+                    finished = True
+                    break
+
+                chapters.extend(page["data"])
+
+        if finished or total <= 10000:
+            break
 
-        iteration += 1
-        retry = 0
+        # Get the next 10k batch using the last available chapter's created at date
+        logger.debug("Reached 10k %ss, looping over next 10k.", route)
+        created_at_since_time = chapters[-1]["attributes"]["createdAt"].split("+")[0]
 
     return sorted(
         chapters,
-        key=lambda chap_timestamp: datetime.strptime(
-            chap_timestamp["attributes"]["createdAt"], "%Y-%m-%dT%H:%M:%S%z"
+        key=lambda chap_timestamp: datetime.fromisoformat(
+            chap_timestamp["attributes"]["createdAt"]
         ),
     )
 
 
 def iter_aggregate_chapters(aggregate_chapters: dict):
     """Return a generator for each chapter object in the aggregate response."""
-    for volume in aggregate_chapters:
-        if isinstance(aggregate_chapters, dict):
-            volume_iter = aggregate_chapters[volume]["chapters"]
-        elif isinstance(aggregate_chapters, list):
-            volume_iter = volume["chapters"]
+    if isinstance(aggregate_chapters, dict):
+        volumes = aggregate_chapters.values()
+    else:
+        volumes = aggregate_chapters
+
+    for volume in volumes:
+        volume_chapters = volume["chapters"]
+        if isinstance(volume_chapters, dict):
+            yield from volume_chapters.values()
+        else:
+            yield from volume_chapters
 
-        for chapter in volume_iter:
-            if isinstance(chapter, str):
-                chapter_iter = volume_iter[chapter]
-            elif isinstance(chapter, dict):
-                chapter_iter = chapter
 
-            yield chapter_iter
+def _make_cache_key(url: str, params: dict) -> tuple:
+    return url, tuple(
+        sorted(
+            (key, tuple(value) if isinstance(value, list) else value)
+            for key, value in params.items()
+        )
+    )
 
 
 def fetch_aggregate(http_client, manga_id: str, **params) -> Optional[dict]:
     """Call the mangadex api to get the volumes of each chapter."""
+    aggregate_url = f"{mangadex_api_url}/manga/{manga_id}/aggregate"
+    cache_key = _make_cache_key(aggregate_url, params)
+
+    with aggregate_cache_lock:
+        cached_aggregate = aggregate_cache.get(cache_key)
+    if cached_aggregate is not None and cached_aggregate[0] > time.monotonic():
+        return cached_aggregate[1]
+
     try:
-        aggregate_response = http_client.get(
-            f"{mangadex_api_url}/manga/{manga_id}/aggregate",
-            params=params,
-        )
+        aggregate_response = http_client.get(aggregate_url, params=params)
     except RequestError as e:
         return
 
@@ -126,14 +173,22 @@ def fetch_aggregate(http_client, manga_id: str, **params) -> Optional[dict]:
         aggregate_response.status_code in range(200, 300)
         and aggregate_response.data is not None
     ):
-        return aggregate_response.data["volumes"]
+        aggregate_volumes = aggregate_response.data["volumes"]
+        with aggregate_cache_lock:
+            if len(aggregate_cache) >= aggregate_cache_size:
+                aggregate_cache.clear()
+            aggregate_cache[cache_key] = (
+                time.monotonic() + aggregate_cache_ttl,
+                aggregate_volumes,
+            )
+        return aggregate_volumes
 
     logger.error(f"Error returned from aggregate response for manga {manga_id}")
 
 
-def flatten(t: List[list]) -> list:
+def flatten(t: Iterable[Iterable]) -> list:
     """Flatten nested lists into one list."""
-    return [item for sublist in t for item in sublist]
+    return list(itertools.chain.from_iterable(t))
 
 
 def find_key_from_list_value(
@@ -145,6 +200,15 @@ def find_key_from_list_value(
             return key
 
 
+def build_reverse_index(dict_to_index: Dict[str, List[str]]) -> Dict[str, str]:
+    """Map each list value to the first key it's listed under."""
+    reverse_index = {}
+    for key, values in dict_to_index.items():
+        for value in values:
+            reverse_index.setdefault(value, key)
+    return reverse_index
+
+
 def find_key_from_value(
     dict_to_search: Dict[str, str], element_value: str
 ) -> Optional[str]:
@@ -160,26 +224,27 @@ def format_title(manga_data: dict) -> str:
     if attributes is None:
         return manga_data["id"]
 
-    manga_title = attributes["title"].get("en")
-    if manga_title is None:
-        key = next(iter(attributes["title"]))
-        manga_title = attributes["title"].get(
-            attributes["originalLanguage"], attributes["title"][key]
-        )
-    return manga_title
+    manga_titles = attributes["title"]
+    return (
+        manga_titles.get("en")
+        or manga_titles.get(attributes.get("originalLanguage"))
+        or next(iter(manga_titles.values()), manga_data["id"])
+    )
 
 
 def create_new_event_loop():
     """Return the event loop, create one if not there is not one running."""
     try:
-        return asyncio.get_event_loop()
-    except RuntimeError as e:
-        if str(e).startswith("There is no current event loop in thread"):
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            return loop
-        else:
-            raise
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+
+    loop = getattr(event_loops, "loop", None)
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        event_loops.loop = loop
+    return loop
 
 
 def check_chapter_url_same(md_external_url: str, chapter_id: str) -> bool:
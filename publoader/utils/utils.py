@@ -1,20 +1,37 @@
+import copy
 import datetime
+import functools
+import itertools
 import json
 import logging
 import re
 from pathlib import Path
-from typing import Dict
+from types import MappingProxyType
+from typing import Dict, Iterator, Mapping
+
+import orjson
 
 logger = logging.getLogger("publoader")
 
 root_path = Path(".")
 
 
-def open_manga_id_map(manga_map_path: Path) -> dict:
+@functools.lru_cache(maxsize=32)
+def _load_json_file(file_path: str, mtime_ns: int):
+    """Parse a json file, cached per file modification time."""
+    return orjson.loads(Path(file_path).read_bytes())
+
+
+def load_json_file(file_path: Path):
+    """Open a json file, reusing the parsed data while the file is unchanged.
+    The data is shared between callers, so it mustn't be modified."""
+    return _load_json_file(str(file_path), file_path.stat().st_mtime_ns)
+
+
+def open_manga_id_map(manga_map_path: Path) -> Mapping:
     """Open external id to mangadex id map."""
     try:
-        with open(manga_map_path, "r") as manga_map_fp:
-            manga_map = json.load(manga_map_fp)
+        manga_map = load_json_file(manga_map_path)
     except json.JSONDecodeError as e:
         logger.critical("Manga map file is corrupted.")
         raise json.JSONDecodeError(
@@ -23,29 +40,28 @@ def open_manga_id_map(manga_map_path: Path) -> dict:
     except FileNotFoundError:
         logger.critical("Manga map file is missing.")
         raise FileNotFoundError("Couldn't file manga map file.")
-    return manga_map
+    return MappingProxyType(manga_map)
 
 
-def open_title_regex(override_options_path: Path) -> dict:
+def open_title_regex(override_options_path: Path) -> Mapping:
     """Open the custom regexes."""
     try:
-        with open(override_options_path, "r") as title_regex_fp:
-            override_options = json.load(title_regex_fp)
+        override_options = load_json_file(override_options_path)
     except json.JSONDecodeError as e:
         logger.critical("Title regex file is corrupted.")
         return {}
     except FileNotFoundError:
         logger.critical("Title regex file is missing.")
         return {}
-    return override_options
+    return MappingProxyType(override_options)
 
 
 def open_manga_data(manga_data_path: Path) -> Dict[str, dict]:
-    """Open MangaDex titles data."""
+    """Open MangaDex titles data. The caller adds to it, so it gets a copy of
+    the cached data."""
     manga_data = {}
     try:
-        with open(manga_data_path, "r") as manga_data_fp:
-            manga_data = json.load(manga_data_fp)
+        manga_data = copy.deepcopy(load_json_file(manga_data_path))
     except json.JSONDecodeError as e:
         logger.error("Manga data file is corrupted.")
     except FileNotFoundError:
@@ -53,6 +69,13 @@ def open_manga_data(manga_data_path: Path) -> Dict[str, dict]:
     return manga_data
 
 
+def batched(iterable, size: int) -> Iterator[list]:
+    """Split the iterable into lists of up to size items."""
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
 def get_current_datetime():
     """Get current datetime as timezone-aware."""
     return datetime.datetime.now(tz=datetime.timezone.utc)
@@ -1,5 +1,10 @@
+import atexit
+import functools
 import logging
+import queue
+import threading
 import time
+from collections import deque
 from json import JSONDecodeError
 from typing import Dict, List, Optional, Union
 
@@ -7,7 +12,7 @@ from discord_webhook import DiscordEmbed, DiscordWebhook
 
 from publoader.models.dataclasses import Chapter
 from publoader.utils.config import config
-from publoader.utils.utils import EXPIRE_TIME, get_current_datetime
+from publoader.utils.utils import EXPIRE_TIME, batched, get_current_datetime
 
 logger = logging.getLogger("webhook")
 webhook_url = config["Paths"].get("webhook_url")
@@ -18,7 +23,21 @@ def make_webhook():
 
 
 webhook = make_webhook()
+# Extensions run concurrently and all add to and send the module webhook
+webhook_lock = threading.RLock()
 COLOUR = "B86F8C"
+EXPIRE_TIME_ISO = EXPIRE_TIME.isoformat()
+
+
+def uses_shared_webhook(func):
+    """Hold the module webhook's lock while func adds embeds to and sends it."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with webhook_lock:
+            return func(*args, **kwargs)
+
+    return wrapper
 
 
 class WebhookHelper:
@@ -27,6 +46,12 @@ class WebhookHelper:
         self.colour = kwargs.get("colour") or COLOUR
         self.mangadex_chapter_url = "https://mangadex.org/chapter/{}"
         self.mangadex_manga_url = "https://mangadex.org/manga/{}"
+        self.mangadex_chapter_link = self._format_link(
+            name="MangaDex", type="chapter", url=self.mangadex_chapter_url
+        )
+        self.mangadex_manga_link = self._format_link(
+            name="MangaDex", type="manga", url=self.mangadex_manga_url
+        )
         self.footer = (
             {"text": f"extensions.{self.extension_name}"}
             if self.extension_name is not None
@@ -61,133 +86,186 @@ class WebhookHelper:
         if isinstance(chapter, Chapter):
             chapter = vars(chapter)
 
-        name = f"Success: {success}\nManga: {chapter.get('manga_name')}\nChapter: {chapter.get('chapter_number')}\nExtension: {chapter.get('extension_name')}"
+        chapter_expire = chapter.get("chapter_expire")
+        mangadex_links = ""
+        if not failed_upload:
+            mangadex_links = self.mangadex_chapter_link.format(
+                chapter.get("md_chapter_id")
+            ) + self.mangadex_manga_link.format(chapter.get("md_manga_id"))
+
+        extension_name = chapter.get("extension_name")
+        extension_link_name = (
+            extension_name.title() if extension_name is not None else None
+        )
+        extension_links = ""
+        if chapter.get("chapter_url") is not None:
+            extension_links += f"{extension_link_name} chapter link: [here]({chapter['chapter_url']})\n"
+        if chapter.get("manga_url") is not None:
+            extension_links += (
+                f"{extension_link_name} manga link: [here]({chapter['manga_url']})\n"
+            )
+
+        name = f"Success: {success}\nManga: {chapter.get('manga_name')}\nChapter: {chapter.get('chapter_number')}\nExtension: {extension_name}"
         value = (
             f"Language: `{chapter.get('chapter_language')}`\n"
             f"Chapter title: `{chapter.get('chapter_title')}`\n"
-            f"Chapter expiry: `{(chapter.get('chapter_expire') or EXPIRE_TIME).isoformat()}`\n"
+            f"Chapter expiry: `{chapter_expire.isoformat() if chapter_expire else EXPIRE_TIME_ISO}`\n"
             "\n"
-            f"{self._format_link(name='MangaDex', type='chapter', url=self.mangadex_chapter_url.format(chapter.get('md_chapter_id')), skip_chapter_id=failed_upload)}"
-            f"{self._format_link(name='MangaDex', type='manga', url=self.mangadex_manga_url.format(chapter.get('md_manga_id')), skip_chapter_id=failed_upload)}"
+            f"{mangadex_links}"
             "\n"
-            f"{self._format_link(name=chapter.get('extension_name'), type='chapter', url=chapter.get('chapter_url'))}"
-            f"{self._format_link(name=chapter.get('extension_name'), type='manga', url=chapter.get('manga_url'))}"
+            f"{extension_links}"
         )
 
         return {"name": name, "value": value, "inline": inline}
 
     def normalise_chapters(self, chapters, failed_upload: bool = False):
-        normalised_chapters = [
+        normalised_chapters = (
             self.normalise_chapter(chapter, failed_upload) for chapter in chapters
-        ]
-        return [
-            normalised_chapters[elem : elem + 25]
-            for elem in range(0, len(normalised_chapters), 25)
-        ]
+        )
+        return list(batched(normalised_chapters, 25))
 
     def make_embed(self, embed_data: Optional[dict] = None) -> DiscordEmbed:
         embed = DiscordEmbed(**embed_data, footer=self.footer)
         embed.set_title(embed_data.get("title", None))
         embed.set_description(embed_data.get("description", None))
-        logger.debug(f"Made embed: {embed.title}, {embed.description}")
+        logger.debug("Made embed: %s, %s", embed.title, embed.description)
         return embed
 
     def add_fields_to_embed(
         self, embed: "DiscordEmbed", normalised_chapters: List[dict]
     ):
-        logger.debug(f"Adding chapters to embed {embed.title}: {normalised_chapters}")
+        logger.debug(
+            "Adding chapters to embed %s: %s", embed.title, normalised_chapters
+        )
         for c in normalised_chapters:
             embed.add_embed_field(**c)
 
-    def _calculate_embed_size(self, embed: Union[DiscordEmbed, dict]):
-        if isinstance(embed, DiscordEmbed):
-            embed_dict = embed.__dict__
-        else:
-            embed_dict = embed
+    def _calculate_field_size(self, field: dict) -> int:
+        return len(field.get("name", "") or "") + len(field.get("value", "") or "")
 
+    def _calculate_embed_header_size(self, embed_dict: dict) -> int:
         embed_len = len(embed_dict.get("title", "") or "")
         embed_len += len(embed_dict.get("description", "") or "")
         if embed_dict.get("footer") is not None:
             embed_len += len(embed_dict["footer"].get("text", "") or "")
-
-        fields = embed_dict["fields"]
-        embed_len += sum(
-            [
-                len(field.get("name", "") or "") + len(field.get("value", "") or "")
-                for field in fields
-            ]
-        )
         return embed_len
 
-    def _make_multiple_embeds(self, embed: dict, list_fields: List[List[dict]]):
-        new_embeds = []
-        for fields in list_fields:
-            new_embed = DiscordEmbed(footer=self.footer)
-            new_embed.__dict__.update(embed)
-            new_embed.fields = fields
-
-            embed_len = self._calculate_embed_size(new_embed)
-            new_embed_split = self._check_embed_length(new_embed, embed_len)
-            if new_embed_split is None:
-                new_embeds.append(new_embed)
-            else:
-                new_embeds.extend(new_embed_split)
-        return new_embeds
+    def _calculate_embed_size(self, embed: Union[DiscordEmbed, dict]):
+        if isinstance(embed, DiscordEmbed):
+            embed_dict = embed.__dict__
+        else:
+            embed_dict = embed
+
+        embed_len = self._calculate_embed_header_size(embed_dict)
+        fields = embed_dict.get("fields") or ()
+        embed_len += sum(map(self._calculate_field_size, fields))
+        return embed_len
 
     def _check_embed_length(self, embed, embed_len):
-        if embed_len >= 6000:
-            num_fields = embed["fields"]
-            splitter = 6
+        """Split the embed's fields across as many embeds as needed to keep each
+        under the 6000 character limit."""
+        if embed_len < 6000:
+            return None
+
+        if isinstance(embed, DiscordEmbed):
+            embed = embed.__dict__
 
-            fields_split = [
-                num_fields[elem : elem + splitter]
-                for elem in range(0, len(num_fields), splitter)
-            ]
+        fields = embed["fields"]
+        header_len = self._calculate_embed_header_size(embed)
 
-            split_embeds = self._make_multiple_embeds(embed, fields_split)
-            return split_embeds
-        return None
+        split_embeds = []
+        fields_batch = []
+        batch_len = header_len
+        for field in fields:
+            field_len = self._calculate_field_size(field)
+            if fields_batch and batch_len + field_len >= 6000:
+                split_embeds.append({**embed, "fields": fields_batch})
+                fields_batch = []
+                batch_len = header_len
+
+            fields_batch.append(field)
+            batch_len += field_len
+
+        if fields_batch:
+            split_embeds.append({**embed, "fields": fields_batch})
+        return split_embeds
 
     def check_embeds_size(self, local_webhook: DiscordWebhook):
-        embeds = local_webhook.get_embeds()
-        for index, embed in enumerate(embeds):
+        checked_embeds = []
+        for embed in local_webhook.get_embeds():
             embed_len = self._calculate_embed_size(embed)
             split_embeds = self._check_embed_length(embed, embed_len)
 
-            if split_embeds is not None:
-                local_webhook.embeds.pop(index)
-                local_webhook.embeds[index:index] = split_embeds
-
-    def send_webhook(self, local_webhook: DiscordWebhook = webhook):
+            if split_embeds is None:
+                checked_embeds.append(embed)
+            else:
+                checked_embeds.extend(split_embeds)
+        local_webhook.embeds = checked_embeds
+
+    def _describe_response(self, response):
+        # Successful executes come back as 204 with no body to parse
+        if response.status_code < 400:
+            return response.status_code, None
+        return response.status_code, response.json()
+
+    def _rate_limit_wait(self, response) -> float:
+        """Seconds until the bucket refills, if Discord says it's empty."""
+        headers = getattr(response, "headers", None) or {}
+        if headers.get("X-RateLimit-Remaining") != "0":
+            return 0
+        try:
+            return float(headers.get("X-RateLimit-Reset-After", 0))
+        except ValueError:
+            return 1
+
+    def send_webhook(self, local_webhook: DiscordWebhook = webhook) -> bool:
+        if local_webhook is webhook:
+            with webhook_lock:
+                return self._send_embeds(local_webhook)
+        return self._send_embeds(local_webhook)
+
+    def _send_embeds(self, local_webhook: DiscordWebhook) -> bool:
+        """Send the webhook's embeds, returning whether Discord accepted them all."""
         if webhook_url is None:
-            return
+            return True
 
+        sent = True
         if local_webhook.embeds:
             self.check_embeds_size(local_webhook)
 
-            embeds_split = [
-                local_webhook.embeds[elem : elem + 10]
-                for elem in range(0, len(local_webhook.embeds), 10)
-            ]
+            pending_embeds = deque(local_webhook.embeds)
             local_webhook.embeds.clear()
 
-            for count, embed in enumerate(embeds_split, start=1):
-                local_webhook.embeds = embed
+            while pending_embeds:
+                local_webhook.embeds = [
+                    pending_embeds.popleft()
+                    for _ in range(min(10, len(pending_embeds)))
+                ]
                 response = local_webhook.execute(remove_embeds=True)
+                responses = response if isinstance(response, list) else [response]
+                if any(r.status_code >= 400 for r in responses):
+                    sent = False
+
                 try:
                     if isinstance(response, list):
-                        status_codes = [r.status_code for r in response]
-                        messages = [r.json() for r in response]
-                        logger.info(f"Discord API returned: {status_codes}, {messages}")
+                        logger.info(
+                            f"Discord API returned: {[self._describe_response(r) for r in response]}"
+                        )
                     else:
                         logger.info(
-                            f"Discord API returned: {response.status_code}, {response.json()}"
+                            f"Discord API returned: {self._describe_response(response)}"
                         )
                 except (JSONDecodeError, AttributeError, KeyError) as e:
                     logger.error(e)
 
-                if count < len(embeds_split):
-                    time.sleep(1)
+                if pending_embeds:
+                    last_response = (
+                        response[-1] if isinstance(response, list) else response
+                    )
+                    wait = self._rate_limit_wait(last_response)
+                    if wait > 0:
+                        time.sleep(wait)
+        return sent
 
 
 class WebhookBase(WebhookHelper):
@@ -198,7 +276,7 @@ class WebhookBase(WebhookHelper):
     ) -> None:
         super().__init__(extension_name=extension_name)
         self.manga = manga
-        logger.debug(f"Making embed for manga {self.manga}")
+        logger.debug("Making embed for manga %s", self.manga)
         self.manga_id = manga.get("id", "Manga id not found")
         self.manga_title = manga.get("title", "Manga title not found")
         self.mangadex_manga_url = self.mangadex_manga_url.format(self.manga_id)
@@ -260,6 +338,7 @@ class PubloaderUpdatesWebhook(WebhookBase):
             if len(webhook.embeds) >= 10 or len(embed.fields) >= 5:
                 self.send_webhook()
 
+    @uses_shared_webhook
     def main(self, last_manga: bool = True):
         if self.uploaded > 0 or self.failed > 0:
             self.send_webhook()
@@ -285,11 +364,7 @@ class PubloaderUpdatesWebhook(WebhookBase):
             self.send_webhook()
         else:
             if len(webhook.embeds) >= 10:
-                webhook_embeds = [
-                    webhook.embeds[elem : elem + 10]
-                    for elem in range(0, len(webhook.embeds), 10)
-                ]
-                for embed_list in webhook_embeds:
+                for embed_list in list(batched(webhook.embeds, 10)):
                     webhook.embeds = embed_list
                     if len(webhook.embeds) >= 10:
                         self.send_webhook()
@@ -301,16 +376,20 @@ class PubloaderUpdatesWebhook(WebhookBase):
 class PubloaderQueueWebhook(WebhookHelper):
     def __init__(self, worker_type: str, **kwargs) -> None:
         super().__init__(**kwargs)
-        self.webhook = make_webhook()
         self.worker_type = worker_type.capitalize()
         self.fields = []
+        self.fields_lock = threading.Lock()
+        self._embed_template = {"title": self.worker_type, "color": self.colour}
+        self._timestamp = None
+        self._timestamp_refreshed = 0.0
 
     def normalise_embed(self) -> Dict[str, str]:
-        return {
-            "title": self.worker_type,
-            "timestamp": get_current_datetime().isoformat(),
-            "color": self.colour,
-        }
+        # Embeds sent within the same second share a timestamp
+        now = time.monotonic()
+        if self._timestamp is None or now - self._timestamp_refreshed > 1:
+            self._timestamp = get_current_datetime().isoformat()
+            self._timestamp_refreshed = now
+        return {**self._embed_template, "timestamp": self._timestamp}
 
     def add_chapter(self, chapter: dict, processed: bool = True):
         if self.worker_type.lower() in ["uploader", "deleter"]:
@@ -319,16 +398,15 @@ class PubloaderQueueWebhook(WebhookHelper):
             else:
                 return
 
-        self.fields.append(self.normalise_chapter(chapter, success=processed))
-
-        if len(self.fields) >= 6:
-            embed = self.make_embed(self.normalise_embed())
-            self.add_fields_to_embed(embed, self.fields)
+        with self.fields_lock:
+            self.fields.append(self.normalise_chapter(chapter, success=processed))
 
-            self.webhook.add_embed(embed)
-            self.send_webhook(self.webhook)
+            if len(self.fields) >= 6:
+                embed = self.make_embed(self.normalise_embed())
+                self.add_fields_to_embed(embed, self.fields)
+                queue_embed(embed)
 
-            self.fields[:] = []
+                self.fields[:] = []
 
     def send_queue_finished(self):
         # embed = self.make_embed(self.normalise_embed())
@@ -339,11 +417,11 @@ class PubloaderQueueWebhook(WebhookHelper):
             }
         )
         # self.add_fields_to_embed(embed, self.fields)
-        self.fields[:] = []
+        with self.fields_lock:
+            self.fields[:] = []
 
-        # self.webhook.add_embed(embed)
-        self.webhook.add_embed(embed_last)
-        self.send_webhook(self.webhook)
+        # queue_embed(embed)
+        queue_embed(embed_last)
 
 
 class PubloaderDupesWebhook(WebhookBase):
@@ -389,8 +467,9 @@ class PubloaderDupesWebhook(WebhookBase):
         )
 
     def normalise_chapters(self, chapters: List[dict]) -> str:
-        return "\n".join([f'`{chapter["id"]}`' for chapter in chapters])
+        return "\n".join(f'`{chapter["id"]}`' for chapter in chapters)
 
+    @uses_shared_webhook
     def main(self):
         if self.normalised_manga is not None:
             logger.info(self.normalised_manga)
@@ -426,9 +505,10 @@ class PubloaderNotIndexedWebhook(WebhookHelper):
             footer=self.footer,
         )
 
-        logger.debug(f"Made embed: {embed.title}, {embed.description}")
+        logger.debug("Made embed: %s, %s", embed.title, embed.description)
         return embed
 
+    @uses_shared_webhook
     def main(self):
         title = (
             f"{len(self.chapters_not_indexed)} chapters not indexed:"
@@ -436,13 +516,11 @@ class PubloaderNotIndexedWebhook(WebhookHelper):
             else f"{self.chapters_indexed} chapters indexed"
         )
         description = (
-            "```" + "\n".join(self.chapters_not_indexed) + "```"
+            "\n```" + "\n".join(self.chapters_not_indexed) + "```"
             if self.chapters_not_indexed
             else None
         )
 
-        description = ("\n" + description) if description else None
-
         embed = self.make_embed(title=title, description=description)
         webhook.add_embed(embed)
         self.send_webhook()
@@ -459,7 +537,7 @@ class PubloaderWebhook(WebhookHelper):
         self.timestamp = kwargs.get("timestamp", get_current_datetime().isoformat())
         self.add_timestamp = kwargs.get("add_timestamp", True)
 
-    def main(self, **kwargs):
+    def _build_embed(self) -> DiscordEmbed:
         self.embed = DiscordEmbed(
             title=self.embed_title,
             description=self.embed_description,
@@ -469,14 +547,86 @@ class PubloaderWebhook(WebhookHelper):
 
         if self.add_timestamp:
             self.embed.timestamp = self.timestamp
-        webhook.add_embed(self.embed)
+        return self.embed
+
+    @uses_shared_webhook
+    def main(self, **kwargs):
+        webhook.add_embed(self._build_embed())
 
         if len(webhook.embeds) >= 5:
             self.send_webhook()
 
-    def send(self, **kwargs):
-        self.main()
-        self.send_webhook()
+    def send(self, sync: bool = False, **kwargs) -> Optional[bool]:
+        """Queue the embed for the background sender, or send it now if sync,
+        after the embeds already queued, returning whether it was sent."""
+        if not sync:
+            queue_embed(self._build_embed())
+            return None
+
+        flush_webhooks()
+        with webhook_lock:
+            webhook.add_embed(self._build_embed())
+            return self.send_webhook()
+
+
+def _send_queued_embeds():
+    """Send the queued embeds, batching up to 10 that arrive within 2 seconds."""
+    helper = WebhookHelper()
+    queued_webhook = make_webhook()
+
+    while True:
+        embeds = [webhook_queue.get()]
+        deadline = time.monotonic() + 2
+        while len(embeds) < 10:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            try:
+                embeds.append(webhook_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        for embed in embeds:
+            queued_webhook.add_embed(embed)
+
+        try:
+            helper.send_webhook(queued_webhook)
+        except Exception:
+            logger.exception("Sending queued embeds raised an error.")
+        finally:
+            queued_webhook.embeds.clear()
+            for _ in embeds:
+                webhook_queue.task_done()
+
+
+def _start_webhook_sender():
+    global _webhook_sender
+
+    with _webhook_sender_lock:
+        if _webhook_sender is None or not _webhook_sender.is_alive():
+            _webhook_sender = threading.Thread(
+                target=_send_queued_embeds, daemon=True, name="publoader-webhook"
+            )
+            _webhook_sender.start()
+
+
+def queue_embed(embed: DiscordEmbed):
+    """Hand the embed to the background sender without waiting on Discord."""
+    _start_webhook_sender()
+    webhook_queue.put(embed)
+
+
+def flush_webhooks():
+    """Block until all the queued embeds have been sent."""
+    if _webhook_sender is not None and _webhook_sender.is_alive():
+        webhook_queue.join()
+
+
+webhook_queue = queue.Queue()
+_webhook_sender: Optional[threading.Thread] = None
+_webhook_sender_lock = threading.Lock()
+atexit.register(flush_webhooks)
 
 
 if __name__ == "__main__":
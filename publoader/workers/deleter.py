@@ -1,14 +1,26 @@
 import logging
-from typing import Optional
+import threading
+import time
+from functools import cached_property
+from typing import List, Optional
+
+import pymongo
+from pymongo import DeleteOne
 
 from publoader.http.properties import RequestError
 from publoader.models.database import database_connection
 from publoader.models.dataclasses import Chapter
-from publoader.utils.config import mangadex_api_url
+from publoader.utils.config import delete_batch_size, mangadex_api_url
 from publoader.utils.utils import get_current_datetime
 
 logger = logging.getLogger("publoader-deleter")
 
+# Deleted chapters waiting to be moved into the deleted collection
+deleted_chapters: List[dict] = []
+deleted_chapters_lock = threading.Lock()
+deleted_chapters_flushed_at = time.monotonic()
+deleted_chapters_flush_interval = 5
+
 
 class DeleteProcess:
     def __init__(
@@ -19,30 +31,40 @@ class DeleteProcess:
     ):
         self.upload_chapter = upload_chapter
         self.http_client = http_client
-        self.chapter = Chapter(**self.upload_chapter)
-        self.extension_name = self.chapter.extension_name
+        self.extension_name = self.upload_chapter.get("extension_name")
+
+    @cached_property
+    def chapter(self) -> Chapter:
+        return Chapter(**self.upload_chapter)
 
     def delete_chapter(
         self,
     ) -> bool:
         """Check if the chapters expired and remove off mangadex if they are."""
-        md_chapter_id: Optional[str] = self.chapter.md_chapter_id
-        deleted_message = f"{md_chapter_id}: {self.chapter.chapter_id}, manga {self.chapter.manga_id}, chapter {self.chapter.chapter_number}, language {self.chapter.chapter_language}."
+        upload_chapter = self.upload_chapter
+        md_chapter_id: Optional[str] = upload_chapter.get("md_chapter_id")
+        deleted_message = f"{md_chapter_id}: {upload_chapter.get('chapter_id')}, manga {upload_chapter.get('manga_id')}, chapter {upload_chapter.get('chapter_number')}, language {upload_chapter.get('chapter_language')}."
 
         if md_chapter_id is not None:
             try:
                 delete_reponse = self.http_client.delete(
-                    f"{mangadex_api_url}/chapter/{md_chapter_id}"
+                    f"{mangadex_api_url}/chapter/{md_chapter_id}",
+                    successful_codes=[404],
                 )
             except RequestError as e:
                 logger.error(e)
                 return False
 
             if delete_reponse.status_code == 200:
-                logger.info(f"Deleted {self.chapter}.")
+                logger.info(f"Deleted {deleted_message}")
                 print(f"--Deleted {deleted_message}")
                 return True
 
+            # Deleted before a restart, but not yet moved out of the queue
+            if delete_reponse.status_code == 404:
+                logger.info(f"Already deleted {deleted_message}")
+                return True
+
         logger.error(f"Couldn't delete expired chapter {deleted_message}")
         print(f"Couldn't delete chapter {deleted_message}")
         return False
@@ -54,22 +76,79 @@ def run(item, http_client, queue_webhook, **kwargs):
 
     queue_webhook.add_chapter(item, processed=deleted)
     if deleted:
-        database_connection["to_delete"].delete_one({"_id": {"$eq": item["_id"]}})
-        database_connection["uploaded"].delete_one({"_id": {"$eq": item["_id"]}})
-        item.pop("_id")
-        database_connection["deleted"].insert_one(item)
+        with deleted_chapters_lock:
+            deleted_chapters.append(item)
+            flush_batch = (
+                len(deleted_chapters) >= delete_batch_size
+                or time.monotonic() - deleted_chapters_flushed_at
+                >= deleted_chapters_flush_interval
+            )
 
+        if flush_batch:
+            flush_deleted_chapters()
 
-def fetch_data_from_database():
-    chapters = []
 
-    chapters.extend([chap for chap in database_connection["to_delete"].find()])
-    chapters.extend(
-        [
-            chap
-            for chap in database_connection["uploaded"].find(
-                {"chapter_expire": {"$lte": get_current_datetime()}}
+def flush_deleted_chapters():
+    """Move the deleted chapters into the deleted collection in bulk. They're
+    archived first, so a failed flush leaves them queued to be retried."""
+    global deleted_chapters_flushed_at
+
+    with deleted_chapters_lock:
+        chapters = deleted_chapters[:]
+        deleted_chapters.clear()
+        deleted_chapters_flushed_at = time.monotonic()
+
+    if not chapters:
+        return
+
+    chapter_ids = [chapter.pop("_id") for chapter in chapters]
+    archived_ids = chapter_ids
+    try:
+        database_connection["deleted"].insert_many(chapters, ordered=False)
+    except pymongo.errors.BulkWriteError as e:
+        failed_indexes = set()
+        for write_error in e.details.get("writeErrors", []):
+            failed_indexes.add(write_error["index"])
+            logger.error(
+                f"Couldn't archive deleted chapter {chapter_ids[write_error['index']]}: "
+                f"{write_error.get('errmsg')}"
             )
+        archived_ids = [
+            chapter_id
+            for index, chapter_id in enumerate(chapter_ids)
+            if index not in failed_indexes
         ]
+    except pymongo.errors.PyMongoError as e:
+        logger.exception(f"Couldn't archive deleted chapters {chapter_ids}.")
+        return
+
+    if not archived_ids:
+        return
+
+    delete_requests = [DeleteOne({"_id": chapter_id}) for chapter_id in archived_ids]
+    for collection_name in ("to_delete", "uploaded"):
+        try:
+            database_connection[collection_name].bulk_write(
+                delete_requests, ordered=False
+            )
+        except pymongo.errors.PyMongoError as e:
+            logger.exception(
+                f"Couldn't remove deleted chapters {archived_ids} from {collection_name}."
+            )
+
+
+def fetch_data_from_database():
+    """Queued deletions followed by the expired uploads, in one cursor."""
+    return database_connection["to_delete"].aggregate(
+        [
+            {
+                "$unionWith": {
+                    "coll": "uploaded",
+                    "pipeline": [
+                        {"$match": {"chapter_expire": {"$lte": get_current_datetime()}}}
+                    ],
+                }
+            }
+        ],
+        batchSize=500,
     )
-    return chapters
@@ -1,4 +1,5 @@
 import logging
+from functools import cached_property
 
 from publoader.http.properties import RequestError
 from publoader.models.database import database_connection, update_database
@@ -17,20 +18,26 @@ class EditorProcess:
     ):
         self.upload_chapter = upload_chapter
         self.http_client = http_client
-        self.chapter = Chapter(**self.upload_chapter["chapter"])
         self.payload = self.upload_chapter["payload"]
         self.md_chapter_id = self.upload_chapter["md_chapter_id"]
 
-        self.manga_generic_error_message = (
-            f"Extension: {self.chapter.extension_name}, "
-            f"Manga: {self.chapter.manga_name}, "
-            f"{self.chapter.md_manga_id} - "
-            f"{self.chapter.manga_id}, "
-            f"chapter: {self.chapter.chapter_id}, "
-            f"number: {self.chapter.chapter_number!r}, "
-            f"volume: {self.chapter.chapter_volume!r}, "
-            f"language: {self.chapter.chapter_language!r}, "
-            f"title: {self.chapter.chapter_title!r}"
+    @cached_property
+    def chapter(self) -> Chapter:
+        return Chapter(**self.upload_chapter["chapter"])
+
+    @cached_property
+    def manga_generic_error_message(self):
+        chapter = self.chapter
+        return (
+            f"Extension: {chapter.extension_name}, "
+            f"Manga: {chapter.manga_name}, "
+            f"{chapter.md_manga_id} - "
+            f"{chapter.manga_id}, "
+            f"chapter: {chapter.chapter_id}, "
+            f"number: {chapter.chapter_number!r}, "
+            f"volume: {chapter.chapter_volume!r}, "
+            f"language: {chapter.chapter_language!r}, "
+            f"title: {chapter.chapter_title!r}"
         )
 
     def start_edit(self) -> bool:
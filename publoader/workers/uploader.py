@@ -1,6 +1,7 @@
 import logging
 import time
 from collections import deque
+from functools import cached_property
 from typing import Dict, List, Optional
 
 import natsort
@@ -24,6 +25,8 @@ from publoader.webhook import PubloaderNotIndexedWebhook
 logger = logging.getLogger("publoader-uploader")
 
 uploaded_list = deque()
+# Whether the last upload session this worker opened was committed
+upload_session_closed = False
 
 
 class UploaderProcess:
@@ -43,7 +46,17 @@ class UploaderProcess:
         self.image_ids = images
         self.image_ids_str = [str(img._id) for img in self.image_ids]
 
-        self.manga_generic_error_message = (
+        self.upload_retry_total = upload_retry
+        self.images_upload_session = 10
+        self.images_to_upload_ids: List[str] = []
+        self.images_to_upload_names = {}
+        self.upload_session_id: Optional[str] = None
+        self.failed_image_upload = False
+        self.successful_upload_id: Optional[str] = None
+
+    @cached_property
+    def manga_generic_error_message(self):
+        return (
             f"Extension: {self.extension_name}, "
             f"Manga: {self.chapter.manga_name}, "
             f"{self.mangadex_manga_id} - {self.chapter.manga_id}, "
@@ -54,14 +67,6 @@ class UploaderProcess:
             f"title: {self.chapter.chapter_title!r}"
         )
 
-        self.upload_retry_total = upload_retry
-        self.images_upload_session = 10
-        self.images_to_upload_ids: List[str] = []
-        self.images_to_upload_names = {}
-        self.upload_session_id: Optional[str] = None
-        self.failed_image_upload = False
-        self.successful_upload_id: Optional[str] = None
-
     def _images_upload(self, image_batch: Dict[str, bytes]):
         """Upload the images"""
         try:
@@ -201,28 +206,43 @@ class UploaderProcess:
         logger.error("Exising upload session not deleted.")
         raise Exception(f"Couldn't delete existing upload session.")
 
+    def _begin_upload_session(self) -> Optional[dict]:
+        """Start the upload session."""
+        try:
+            upload_session_response = self.http_client.post(
+                f"{md_upload_api_url}/begin",
+                json={
+                    "manga": self.mangadex_manga_id,
+                    "groups": [self.mangadex_group_id],
+                },
+                tries=1,
+            )
+        except (RequestError,) as e:
+            logger.error(e)
+        else:
+            if upload_session_response.ok:
+                return upload_session_response.data
+
     def _create_upload_session(self) -> Optional[dict]:
         """Try to create an upload session 3 times."""
+        global upload_session_closed
+
+        # Committing the last chapter closed its session, so only look for an
+        # existing session if that didn't happen or starting a new one fails.
+        if upload_session_closed:
+            upload_session_closed = False
+            upload_session_response_json = self._begin_upload_session()
+            if upload_session_response_json is not None:
+                return upload_session_response_json
+
         try:
             self._delete_exising_upload_session()
         except Exception as e:
             logger.error(e)
         else:
-            # Start the upload session
-            try:
-                upload_session_response = self.http_client.post(
-                    f"{md_upload_api_url}/begin",
-                    json={
-                        "manga": self.mangadex_manga_id,
-                        "groups": [self.mangadex_group_id],
-                    },
-                    tries=1,
-                )
-            except (RequestError,) as e:
-                logger.error(e)
-            else:
-                if upload_session_response.ok:
-                    return upload_session_response.data
+            upload_session_response_json = self._begin_upload_session()
+            if upload_session_response_json is not None:
+                return upload_session_response_json
 
         # Couldn't create an upload session, skip the chapter
         upload_session_response_json_message = (
@@ -235,6 +255,7 @@ class UploaderProcess:
 
     def _commit_chapter(self) -> bool:
         """Try commit the chapter to mangadex."""
+        global upload_session_closed
         payload = {
             "chapterDraft": {
                 "volume": self.chapter.chapter_volume,
@@ -268,6 +289,7 @@ class UploaderProcess:
             return False
 
         if chapter_commit_response.status_code == 200:
+            upload_session_closed = True
             if chapter_commit_response.data is not None:
                 self.successful_upload_id = chapter_commit_response.data["data"]["id"]
                 self.chapter.md_chapter_id = self.successful_upload_id
@@ -1,9 +1,12 @@
+import functools
 import importlib.util
 import logging
 import queue
+import signal
 import sys
 import threading
 import traceback
+from typing import Optional
 
 import pymongo
 
@@ -11,6 +14,7 @@ from publoader.http import http_client
 from publoader.models.database import (
     database_connection,
 )
+from publoader.utils.config import stream_batch_size, stream_max_await_ms
 from publoader.utils.utils import root_path
 from publoader.webhook import PubloaderQueueWebhook
 from publoader.workers import worker as watcher_worker
@@ -19,7 +23,11 @@ logger = logging.getLogger("publoader")
 
 worker_paths = root_path.joinpath("publoader", "workers")
 worker_paths.mkdir(parents=True, exist_ok=True)
-bot_queue = queue.Queue()
+# Bounded so a large backlog streams in as the workers keep up
+bot_queue = queue.Queue(maxsize=1024)
+# The thread queueing the database backlog and the event telling it to stop
+filler_thread: Optional[threading.Thread] = None
+filler_stop = threading.Event()
 
 
 def worker(worker_type: str, worker_module, http_client, queue_webhook, **kwargs):
@@ -36,30 +44,95 @@ def worker(worker_type: str, worker_module, http_client, queue_webhook, **kwargs
             logger.exception(f"{worker_type.title()} raised an error.")
 
         bot_queue.task_done()
-        if bot_queue.qsize() == 0:
+        # Nothing queued or still being worked on by the other threads
+        if bot_queue.unfinished_tasks == 0:
             # queue_webhook.send_queue_finished()
 
             if worker_type == "uploader":
                 worker_module.check_all_chapters_uploaded()
+            elif worker_type == "deleter":
+                worker_module.flush_deleted_chapters()
 
 
-def setup_thread(worker_type, queue_webhook, worker_module, *args, **kwargs):
-    """Start the worker thread."""
+def _put_until_stopped(item, stop: threading.Event) -> bool:
+    """Put the item on the queue, giving up if the filler is told to stop."""
+    while not stop.is_set():
+        try:
+            bot_queue.put(item, timeout=1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def fill_queue(worker_module, stop: threading.Event):
+    """Queue the items already in the database. The cursor sits idle while the
+    queue is full, if the server reaps it, reopen it and skip what's queued."""
+    queued_ids = set()
+    while not stop.is_set():
+        try:
+            for chapter in worker_module.fetch_data_from_database():
+                if chapter["_id"] in queued_ids:
+                    continue
+
+                if not _put_until_stopped(chapter, stop):
+                    return
+                queued_ids.add(chapter["_id"])
+            return
+        except pymongo.errors.CursorNotFound:
+            logger.warning(
+                "Backlog cursor expired while the queue was full, reopening."
+            )
+        except Exception:
+            logger.exception("Couldn't queue the backlog.")
+            return
+
+
+def setup_threads(
+    worker_type, queue_webhook, worker_module, worker_threads=1, *args, **kwargs
+):
+    """Start the worker threads."""
+    global filler_thread, filler_stop
+
+    # Stop the previous filler so the backlog isn't queued twice
+    if filler_thread is not None and filler_thread.is_alive():
+        filler_stop.set()
+        filler_thread.join()
+
+    # The old workers are gone, drop their items and the count of unfinished
+    # tasks, otherwise the idle hooks never see it return to zero.
     with bot_queue.mutex:
         bot_queue.queue.clear()
+        bot_queue.unfinished_tasks = 0
+        bot_queue.all_tasks_done.notify_all()
+        bot_queue.not_full.notify_all()
+
+    threads = []
+    for _ in range(max(1, worker_threads)):
+        thread = threading.Thread(
+            target=worker,
+            daemon=True,
+            args=(worker_type, worker_module, http_client, queue_webhook),
+            kwargs=kwargs,
+        )
+        thread.start()
+        threads.append(thread)
+
+    # Fill from a separate thread, the put blocks while the queue is full and the
+    # change stream should start watching straight away.
+    filler_stop = threading.Event()
+    filler_thread = threading.Thread(
+        target=fill_queue, daemon=True, args=(worker_module, filler_stop), name="filler"
+    )
+    filler_thread.start()
+    return threads
 
-    chapters = worker_module.fetch_data_from_database()
-    for chapter in chapters:
-        bot_queue.put(chapter)
 
-    thread = threading.Thread(
-        target=worker,
-        daemon=True,
-        args=(worker_type, worker_module, http_client, queue_webhook),
-        kwargs=kwargs,
-    )
-    thread.start()
-    return thread
+def stop_watcher(worker_type, worker_module, signum, frame):
+    """Flush what the workers buffered before worker.kill() ends the process."""
+    if worker_type == "deleter":
+        worker_module.flush_deleted_chapters()
+    sys.exit(0)
 
 
 def open_worker_module(worker_type):
@@ -78,6 +151,7 @@ def main(
     table_name: str,
     webhook_colour: str,
     restart_threads: bool,
+    worker_threads: int = 1,
     **kwargs,
 ):
     """Start the watcher."""
@@ -85,34 +159,54 @@ def main(
         worker_type=worker_type, colour=webhook_colour
     )
     worker_module = open_worker_module(worker_type)
+    signal.signal(
+        signal.SIGTERM, functools.partial(stop_watcher, worker_type, worker_module)
+    )
 
-    # Turn-on the worker thread.
-    thread = setup_thread(
+    # Turn-on the worker threads.
+    threads = setup_threads(
         worker_type=worker_type,
         queue_webhook=queue_webhook,
         worker_module=worker_module,
+        worker_threads=worker_threads,
     )
     print(f"Starting {worker_type.title()} watcher.")
     logger.info(f"Starting {worker_type.title()} watcher.")
 
+    # Reopened streams carry on from the last change seen instead of the present
+    resume_token = None
     while True:
         try:
             with database_connection[table_name].watch(
-                [{"$match": {"operationType": "insert"}}]
+                [{"$match": {"operationType": "insert"}}],
+                batch_size=stream_batch_size,
+                max_await_time_ms=stream_max_await_ms,
+                resume_after=resume_token,
             ) as stream:
-                for change in stream:
-                    bot_queue.put(change["fullDocument"])
-
-                if not thread.is_alive():
-                    if not restart_threads:
-                        watcher_worker.kill()
-                    else:
-                        print(f"Restarting {worker_type.title()} Thread")
-                        thread = setup_thread(
-                            worker_type=worker_type,
-                            queue_webhook=queue_webhook,
-                            worker_module=worker_module,
-                        )
+                while stream.alive:
+                    # Queue the buffered changes, try_next only returns None once
+                    # the server has waited out an empty batch.
+                    change = stream.try_next()
+                    resume_token = stream.resume_token
+                    if change is not None:
+                        bot_queue.put(change["fullDocument"])
+                        continue
+
+                    if not any(thread.is_alive() for thread in threads):
+                        if not restart_threads:
+                            watcher_worker.kill()
+                        else:
+                            print(f"Restarting {worker_type.title()} Thread")
+                            threads = setup_threads(
+                                worker_type=worker_type,
+                                queue_webhook=queue_webhook,
+                                worker_module=worker_module,
+                                worker_threads=worker_threads,
+                            )
+        except pymongo.errors.OperationFailure as e:
+            # The token may have fallen off the oplog, start from the present
+            print(e)
+            resume_token = None
         except pymongo.errors.PyMongoError as e:
             print(e)
 
@@ -1,24 +1,56 @@
 import multiprocessing
+import os
+import sys
 
+from publoader.utils.config import max_requests
 from publoader.workers import watcher
 
 
+def get_process_context():
+    """Get the multiprocessing context for the watcher processes."""
+    start_method = os.environ.get("PUBLOADER_START_METHOD")
+    if start_method is None:
+        # Fork reuses the already imported bot instead of re-importing it in
+        # every watcher. Fork is only the default on Linux; other platforms spawn.
+        start_method = "fork" if sys.platform.startswith("linux") else "spawn"
+    return multiprocessing.get_context(start_method)
+
+
 def main(restart_threads=True):
     """Initialise watcher processes."""
     try:
+        process_context = get_process_context()
+        # MangaDex only allows one open upload session per account, so the
+        # uploader has to stay on a single thread.
         watchers = [
-            {"name": "uploader", "table": "to_upload", "colour": "26D454"},
-            {"name": "deleter", "table": "to_delete", "colour": "C43542"},
-            {"name": "editor", "table": "to_edit", "colour": "FFF71C"},
+            {
+                "name": "uploader",
+                "table": "to_upload",
+                "colour": "26D454",
+                "threads": 1,
+            },
+            {
+                "name": "deleter",
+                "table": "to_delete",
+                "colour": "C43542",
+                "threads": max_requests,
+            },
+            {
+                "name": "editor",
+                "table": "to_edit",
+                "colour": "FFF71C",
+                "threads": max_requests,
+            },
         ]
         for worker in watchers:
-            process = multiprocessing.Process(
+            process = process_context.Process(
                 target=watcher.main,
                 kwargs={
                     "worker_type": worker["name"],
                     "table_name": worker["table"],
                     "webhook_colour": worker["colour"],
                     "restart_threads": restart_threads,
+                    "worker_threads": worker["threads"],
                 },
             )
             process.start()
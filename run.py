@@ -10,6 +10,8 @@ from importlib import reload
 
 from scheduler import Scheduler
 
+from publoader.models.database import create_indexes
+from publoader.publoader import add_run_arguments
 from publoader.updater import PubloaderUpdater
 from publoader.utils.config import (
     daily_run_time_checks_hour,
@@ -18,6 +20,7 @@ from publoader.utils.config import (
     daily_run_time_daily_minute,
 )
 from publoader.utils.utils import get_current_datetime, root_path
+from publoader.webhook import flush_webhooks
 from publoader.workers import worker
 
 logger = logging.getLogger("publoader")
@@ -113,35 +116,13 @@ def restart():
     updater.update()
     install_requirements()
 
+    flush_webhooks()
     print(f"Restarting with args {sys.executable=} {sys.argv=}")
     os.execv(sys.executable, [sys.executable, sys.argv[0]])
 
 
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser()
-    parser.add_argument(
-        "--clean",
-        "-c",
-        default=False,
-        const=True,
-        nargs="?",
-        help="Clean the database.",
-    )
-    parser.add_argument(
-        "--force",
-        "-f",
-        default=False,
-        const=True,
-        nargs="?",
-        help="Force run the bot, if extensions is unspecified, run all.",
-    )
-    parser.add_argument(
-        "--extension",
-        "-e",
-        action="append",
-        required=False,
-        help="Run a specific extension.",
-    )
+    parser = add_run_arguments(argparse.ArgumentParser())
     parser.add_argument(
         "--update",
         "-u",
@@ -156,6 +137,7 @@ if __name__ == "__main__":
     if vargs["update"]:
         restart()
 
+    create_indexes()
     worker.main()
 
     if vargs["extension"] is None:
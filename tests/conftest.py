@@ -0,0 +1,68 @@
+import io
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+repo_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(repo_root))
+
+# The bot reads config.ini and writes its logs relative to the working
+# directory when it's imported, run the tests from a scratch copy.
+test_root = Path(tempfile.mkdtemp(prefix="publoader-tests-"))
+config_text = repo_root.joinpath("config.ini.example").read_text()
+config_text = (
+    config_text.replace("MONGODB_URI=", "MONGODB_URI=mongodb://localhost:27017")
+    .replace("MONGODB_DB_NAME=", "MONGODB_DB_NAME=publoader_tests")
+    .replace("GITHUB_ACCESS_TOKEN=", "GITHUB_ACCESS_TOKEN=test-token")
+)
+test_root.joinpath("config.ini").write_text(config_text)
+os.chdir(test_root)
+
+
+class FakeResponse:
+    """A canned requests response."""
+
+    def __init__(self, status_code=200, json_data=None, headers=None, content=b""):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.json_data = json_data
+        self.headers = headers or {}
+        self.content = content
+        self.raw = io.BytesIO(content)
+        self.url = "https://example.org"
+
+    def json(self):
+        return self.json_data
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class FakeCollection:
+    """Records the calls made to a Mongo collection."""
+
+    def __init__(self, documents=None):
+        self.documents = documents or {}
+        self.calls = []
+
+    def find_one(self, query):
+        self.calls.append(("find_one", (query,), {}))
+        return self.documents.get(query["_id"]["$eq"])
+
+    def __getattr__(self, name):
+        def record(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+
+        return record
+
+
+class FakeDatabase(dict):
+    """Hands out a FakeCollection per collection name."""
+
+    def __missing__(self, key):
+        collection = self[key] = FakeCollection()
+        return collection
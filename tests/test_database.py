@@ -0,0 +1,50 @@
+import pytest
+
+from publoader.models import database
+
+from conftest import FakeCollection, FakeDatabase
+
+
+@pytest.fixture
+def untracked_manga(monkeypatch):
+    fake_database = FakeDatabase()
+    monkeypatch.setattr(database, "database_connection", fake_database)
+    monkeypatch.setattr(database, "untracked_manga_hashes", {})
+    fake_database["untracked_manga"] = FakeCollection(
+        {"extension": {"_id": "extension", "untracked_hash": "stored"}}
+    )
+    return fake_database["untracked_manga"]
+
+
+def test_hash_untracked_manga_ignores_order():
+    assert database.hash_untracked_manga(["a", "b"]) == database.hash_untracked_manga(
+        ["b", "a"]
+    )
+    assert database.hash_untracked_manga(["a"]) != database.hash_untracked_manga(
+        ["a", "b"]
+    )
+
+
+def test_stored_hash_is_looked_up_once(untracked_manga):
+    assert not database.check_untracked_manga_changed("extension", "stored")
+    assert database.check_untracked_manga_changed("extension", "other")
+    assert database.check_untracked_manga_changed("new-extension", "other")
+
+    assert [call[0] for call in untracked_manga.calls] == ["find_one", "find_one"]
+
+
+def test_store_and_clear_untracked_manga_hash(untracked_manga):
+    database.store_untracked_manga_hash("extension", "new")
+    assert not database.check_untracked_manga_changed("extension", "new")
+
+    database.store_untracked_manga_hash("extension", None)
+    assert not database.check_untracked_manga_changed("extension", None)
+
+    assert untracked_manga.calls == [
+        (
+            "update_one",
+            ({"_id": {"$eq": "extension"}}, {"$set": {"untracked_hash": "new"}}),
+            {"upsert": True},
+        ),
+        ("delete_one", ({"_id": {"$eq": "extension"}},), {}),
+    ]
@@ -0,0 +1,46 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from publoader.models.dataclasses import Chapter, _field_default
+
+
+def test_from_database_copies_stored_fields():
+    timestamp = datetime(2023, 1, 1)
+    chapter = Chapter.from_database(
+        {
+            "_id": "object-id",
+            "chapter_id": "1",
+            "chapter_timestamp": timestamp,
+            "md_manga_id": "manga-id",
+        }
+    )
+
+    assert chapter.chapter_id == "1"
+    assert chapter.chapter_timestamp == timestamp
+    assert chapter.md_manga_id == "manga-id"
+    assert not hasattr(chapter, "_id")
+
+
+def test_from_database_defaults_missing_fields():
+    chapter = Chapter.from_database({"chapter_id": "1"})
+
+    assert chapter.chapter_title is None
+    assert chapter.images is None
+
+
+def test_field_default_uses_declared_default():
+    @dataclass
+    class Example:
+        required: int
+        name: str = "default"
+        tags: list = field(default_factory=list)
+
+    defaults = {
+        example_field.name: _field_default(example_field)
+        for example_field in Example.__dataclass_fields__.values()
+    }
+
+    assert defaults["required"]() is None
+    assert defaults["name"]() == "default"
+    assert defaults["tags"]() == []
+    assert defaults["tags"]() is not defaults["tags"]()
@@ -0,0 +1,108 @@
+import time
+
+import pymongo
+import pytest
+from pymongo import DeleteOne
+
+from publoader.workers import deleter
+
+from conftest import FakeDatabase, FakeResponse
+
+
+class FakeHTTPClient:
+    def __init__(self, status_code=200):
+        self.status_code = status_code
+
+    def delete(self, route, **kwargs):
+        return FakeResponse(self.status_code)
+
+
+class FakeQueueWebhook:
+    def __init__(self):
+        self.chapters = []
+
+    def add_chapter(self, item, processed):
+        self.chapters.append((item["_id"], processed))
+
+
+@pytest.fixture
+def database(monkeypatch):
+    database = FakeDatabase()
+    monkeypatch.setattr(deleter, "database_connection", database)
+    monkeypatch.setattr(deleter, "deleted_chapters", [])
+    monkeypatch.setattr(deleter, "deleted_chapters_flushed_at", time.monotonic())
+    return database
+
+
+def make_item(item_id):
+    return {"_id": item_id, "chapter_id": str(item_id), "md_chapter_id": "md-id"}
+
+
+def test_run_buffers_deleted_chapter(database):
+    queue_webhook = FakeQueueWebhook()
+
+    deleter.run(make_item(1), FakeHTTPClient(), queue_webhook)
+
+    assert queue_webhook.chapters == [(1, True)]
+    assert deleter.deleted_chapters == [make_item(1)]
+    assert database == {}
+
+
+def test_run_treats_missing_chapter_as_deleted(database):
+    queue_webhook = FakeQueueWebhook()
+
+    deleter.run(make_item(1), FakeHTTPClient(404), queue_webhook)
+
+    assert queue_webhook.chapters == [(1, True)]
+    assert deleter.deleted_chapters == [make_item(1)]
+
+
+def test_run_keeps_chapter_that_failed_to_delete(database):
+    queue_webhook = FakeQueueWebhook()
+
+    deleter.run(make_item(1), FakeHTTPClient(500), queue_webhook)
+
+    assert queue_webhook.chapters == [(1, False)]
+    assert deleter.deleted_chapters == []
+
+
+def test_flush_archives_then_removes_chapters(database):
+    for item_id in (1, 2):
+        deleter.run(make_item(item_id), FakeHTTPClient(), FakeQueueWebhook())
+
+    deleter.flush_deleted_chapters()
+
+    archived = [
+        {"chapter_id": "1", "md_chapter_id": "md-id"},
+        {"chapter_id": "2", "md_chapter_id": "md-id"},
+    ]
+    assert database["deleted"].calls == [
+        ("insert_many", (archived,), {"ordered": False})
+    ]
+    for collection_name in ("to_delete", "uploaded"):
+        assert database[collection_name].calls == [
+            (
+                "bulk_write",
+                ([DeleteOne({"_id": 1}), DeleteOne({"_id": 2})],),
+                {"ordered": False},
+            )
+        ]
+    assert deleter.deleted_chapters == []
+
+
+def test_flush_keeps_chapters_queued_when_archive_fails(database):
+    def failed_insert(chapters, ordered):
+        raise pymongo.errors.BulkWriteError(
+            {"writeErrors": [{"index": 1, "errmsg": "failed"}]}
+        )
+
+    database["deleted"].insert_many = failed_insert
+    for item_id in (1, 2):
+        deleter.run(make_item(item_id), FakeHTTPClient(), FakeQueueWebhook())
+
+    deleter.flush_deleted_chapters()
+
+    # The chapter that wasn't archived stays queued to be deleted again
+    assert database["to_delete"].calls == [
+        ("bulk_write", ([DeleteOne({"_id": 1})],), {"ordered": False})
+    ]
@@ -0,0 +1,93 @@
+import threading
+import time
+
+from publoader.http import http_client
+
+from conftest import FakeResponse
+
+
+def test_request_slots_bound_concurrent_requests(monkeypatch):
+    lock = threading.Lock()
+    in_flight = 0
+    peak = 0
+
+    def fake_request(*args, **kwargs):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.02)
+        with lock:
+            in_flight -= 1
+        return FakeResponse(json_data={"result": "ok"})
+
+    monkeypatch.setattr(http_client, "_request_slots", threading.BoundedSemaphore(2))
+    monkeypatch.setattr(http_client.session, "request", fake_request)
+    monkeypatch.setattr(http_client, "_calculate_sleep_time", lambda **kwargs: False)
+
+    threads = [
+        threading.Thread(
+            target=http_client.get, args=("https://api.mangadex.org/test",)
+        )
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak == 2
+
+
+def test_relogin_skips_when_token_already_replaced(monkeypatch):
+    logins = []
+
+    def fake_login():
+        logins.append(threading.current_thread().name)
+        http_client.session.headers["Authorization"] = f"Bearer {len(logins)}"
+        return True
+
+    monkeypatch.setattr(http_client, "_login", fake_login)
+    monkeypatch.setitem(http_client.session.headers, "Authorization", "Bearer 0")
+
+    threads = [
+        threading.Thread(target=http_client._relogin, args=("Bearer 0",))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(logins) == 1
+
+
+def test_pause_holds_back_other_threads(monkeypatch):
+    monkeypatch.setattr(http_client, "_ratelimit_resume_at", time.monotonic() + 0.1)
+
+    started = time.monotonic()
+    http_client._wait_for_ratelimit()
+
+    assert time.monotonic() - started >= 0.09
+
+
+def test_request_counts_are_exact_across_threads(monkeypatch):
+    monkeypatch.setattr(http_client, "number_of_requests", 0)
+    monkeypatch.setattr(http_client, "total_requests", 0)
+    # A high limit so no thread has to pause
+    headers = {"x-ratelimit-limit": "10000", "x-ratelimit-remaining": "10000"}
+
+    def send_requests():
+        for _ in range(250):
+            http_client._calculate_sleep_time(
+                status_code=200, wait=True, headers=headers
+            )
+
+    threads = [threading.Thread(target=send_requests) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert http_client.total_requests == 2000
+    assert http_client.number_of_requests == 2000
@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta, timezone
+
+from publoader.utils import misc
+
+base_time = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+
+def make_page(offset, limit, total):
+    return {
+        "data": [
+            {
+                "id": str(index),
+                "attributes": {
+                    "createdAt": (base_time + timedelta(seconds=index)).isoformat()
+                },
+            }
+            for index in range(offset, min(offset + limit, total))
+        ],
+        "total": total,
+    }
+
+
+def test_get_md_api_fetches_every_page(monkeypatch):
+    offsets = []
+
+    def fake_fetch(route, parameters):
+        offsets.append(parameters["offset"])
+        return make_page(parameters["offset"], parameters["limit"], 250)
+
+    monkeypatch.setattr(misc, "_fetch_md_api_page", fake_fetch)
+
+    chapters = misc.get_md_api("chapter", groups=["group-id"])
+
+    assert sorted(offsets) == [0, 100, 200]
+    assert [chapter["id"] for chapter in chapters] == [str(i) for i in range(250)]
+
+
+def test_get_md_api_stops_at_missing_page(monkeypatch):
+    def fake_fetch(route, parameters):
+        if parameters["offset"] == 100:
+            return None
+        return make_page(parameters["offset"], parameters["limit"], 250)
+
+    monkeypatch.setattr(misc, "_fetch_md_api_page", fake_fetch)
+
+    chapters = misc.get_md_api("chapter")
+
+    assert [chapter["id"] for chapter in chapters] == [str(i) for i in range(100)]
+
+
+def test_page_executor_is_shared_within_a_process(monkeypatch):
+    monkeypatch.setattr(misc, "page_executor", None)
+    executor = misc._get_page_executor()
+
+    assert misc._get_page_executor() is executor
+
+    # A forked process doesn't reuse its parent's pool
+    monkeypatch.setattr(misc, "page_executor_pid", -1)
+    forked_executor = misc._get_page_executor()
+    assert forked_executor is not executor
+
+    executor.shutdown()
+    forked_executor.shutdown()
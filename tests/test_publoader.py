@@ -0,0 +1,94 @@
+import pytest
+
+from publoader import publoader
+from publoader.models.dataclasses import Manga
+
+
+class FakeWebhook:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def send(self, sync=False):
+        return True
+
+
+@pytest.fixture
+def untracked_hashes(monkeypatch):
+    stored = {}
+    calls = []
+
+    def check_untracked_manga_changed(extension_name, untracked_hash):
+        calls.append("check")
+        return stored.get(extension_name) != untracked_hash
+
+    def store_untracked_manga_hash(extension_name, untracked_hash):
+        calls.append("store")
+        stored[extension_name] = untracked_hash
+
+    monkeypatch.setattr(publoader, "PubloaderWebhook", FakeWebhook)
+    monkeypatch.setattr(
+        publoader, "check_untracked_manga_changed", check_untracked_manga_changed
+    )
+    monkeypatch.setattr(
+        publoader, "store_untracked_manga_hash", store_untracked_manga_hash
+    )
+    return stored, calls
+
+
+def make_extension_data(untracked_manga):
+    return {
+        "name": "extension",
+        "normalised_extension_name": "Extension",
+        "updated_chapters": [],
+        "all_chapters": [],
+        "untracked_manga": untracked_manga,
+        "tracked_mangadex_ids": [],
+        "mangadex_group_id": "group-id",
+        "override_options": {},
+        "extension_languages": ["en"],
+        "clean_db": False,
+    }
+
+
+def make_manga(manga_id):
+    return Manga(
+        manga_id=manga_id,
+        manga_name=f"Manga {manga_id}",
+        manga_language="en",
+        manga_url=f"https://example.org/{manga_id}",
+    )
+
+
+def test_untracked_manga_hash_is_stored_after_the_report(untracked_hashes, monkeypatch):
+    stored, calls = untracked_hashes
+    monkeypatch.setattr(
+        publoader, "send_untracked_manga_webhook", lambda *args: calls.append("send")
+    )
+
+    # The report failed, so the same manga are reported again next run
+    publoader.run_updates(make_extension_data([make_manga("1")]), {}, [])
+    assert calls == ["check", "send"]
+    assert stored == {}
+
+    calls.clear()
+    monkeypatch.setattr(
+        publoader,
+        "send_untracked_manga_webhook",
+        lambda *args: calls.append("send") or True,
+    )
+    publoader.run_updates(make_extension_data([make_manga("1")]), {}, [])
+    publoader.run_updates(make_extension_data([make_manga("1")]), {}, [])
+    assert calls == ["check", "send", "store", "check"]
+
+
+def test_untracked_manga_hash_is_cleared_once_none_are_left(untracked_hashes):
+    stored, calls = untracked_hashes
+
+    publoader.run_updates(make_extension_data([]), {}, [])
+    assert calls == ["check"]
+
+    stored["extension"] = "hash"
+    calls.clear()
+    publoader.run_updates(make_extension_data([]), {}, [])
+    assert calls == ["check", "store"]
+    assert stored == {"extension": None}
@@ -0,0 +1,103 @@
+import io
+import os
+import tarfile
+
+import orjson
+import pytest
+
+from publoader.updater import PubloaderUpdater
+
+from conftest import FakeResponse
+
+
+def make_tarball(members):
+    """Gzipped tarball of the members, wrapped in GitHub's top level folder."""
+    tarball_bytes = io.BytesIO()
+    with tarfile.open(fileobj=tarball_bytes, mode="w:gz") as tarball:
+        for name, content, member_type in members:
+            member = tarfile.TarInfo(f"owner-repo-sha/{name}")
+            member.type = member_type
+            if member_type == tarfile.SYMTYPE:
+                member.linkname = content
+                tarball.addfile(member)
+            else:
+                member.size = len(content)
+                tarball.addfile(member, io.BytesIO(content))
+    return tarball_bytes.getvalue()
+
+
+@pytest.mark.parametrize("extraction_filters", [True, False])
+def test_download_tarball_extracts_only_files_inside_the_folder(
+    tmp_path, monkeypatch, extraction_filters
+):
+    if not extraction_filters:
+        monkeypatch.delattr(tarfile, "data_filter", raising=False)
+
+    updater = PubloaderUpdater()
+    content = make_tarball(
+        [
+            ("publoader/run.py", b"print()", tarfile.REGTYPE),
+            ("../outside.py", b"print()", tarfile.REGTYPE),
+            ("link", "/etc/passwd", tarfile.SYMTYPE),
+        ]
+    )
+    monkeypatch.setattr(
+        updater.session, "get", lambda *args, **kwargs: FakeResponse(content=content)
+    )
+
+    download_path = tmp_path / "update"
+    assert updater.download_tarball("base-repo", "sha", download_path) is False
+
+    assert download_path.joinpath("publoader", "run.py").read_bytes() == b"print()"
+    assert not tmp_path.joinpath("outside.py").exists()
+    assert not download_path.joinpath("link").exists()
+
+
+def test_download_tarball_removes_partial_extract(tmp_path, monkeypatch):
+    updater = PubloaderUpdater()
+    content = make_tarball([("publoader/run.py", b"print()" * 1000, tarfile.REGTYPE)])
+    monkeypatch.setattr(
+        updater.session,
+        "get",
+        lambda *args, **kwargs: FakeResponse(content=content[: len(content) // 2]),
+    )
+
+    download_path = tmp_path / "update"
+    download_path.mkdir()
+    download_path.joinpath("kept.py").write_text("print()")
+    staging_folders = set(updater.update_path.iterdir())
+
+    assert updater.download_tarball("base-repo", "sha", download_path) is True
+
+    # Files from the other repos sharing the folder are left alone
+    assert [path.name for path in download_path.iterdir()] == ["kept.py"]
+    assert set(updater.update_path.iterdir()) == staging_folders
+
+
+def test_unchanged_commit_etags_are_not_saved_again(monkeypatch):
+    updater = PubloaderUpdater()
+    commits_url = f"https://api.github.com/repos/{updater.repo_owner}/base-repo/commits"
+    commits = {
+        "base_repo": "sha",
+        "extension_repo": None,
+        "extension_private_repo": None,
+        "etags": {},
+        "commit_etags": {commits_url: ["etag", "sha"]},
+    }
+    updater.commits_file.parent.mkdir(parents=True, exist_ok=True)
+    updater.commits_file.write_bytes(orjson.dumps(commits))
+    os.utime(updater.commits_file, ns=(1_000_000_000, 1_000_000_000))
+
+    updater = PubloaderUpdater()
+    monkeypatch.setattr(
+        updater.session,
+        "get",
+        lambda *args, **kwargs: FakeResponse(
+            json_data=[{"sha": "sha"}], headers={"ETag": "etag"}
+        ),
+    )
+
+    assert updater._get_latest_commit("base-repo") == "sha"
+    updater._save_commits()
+
+    assert updater.commits_file.stat().st_mtime_ns == 1_000_000_000
@@ -0,0 +1,54 @@
+import os
+from types import MappingProxyType
+
+from publoader.utils import utils
+
+
+def write_json(path, text, mtime_ns):
+    path.write_text(text)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_open_manga_data_reuses_parsed_data_while_unchanged(tmp_path):
+    path = tmp_path / "manga_data.json"
+    write_json(path, '{"manga-id": {"title": "Title"}}', 1_000_000_000)
+    assert utils.open_manga_data(path) == {"manga-id": {"title": "Title"}}
+
+    # Same mtime, the cached data is used
+    write_json(path, '{"manga-id": {"title": "Changed"}}', 1_000_000_000)
+    assert utils.open_manga_data(path) == {"manga-id": {"title": "Title"}}
+
+    write_json(path, '{"manga-id": {"title": "Changed"}}', 2_000_000_000)
+    assert utils.open_manga_data(path) == {"manga-id": {"title": "Changed"}}
+
+
+def test_open_manga_data_returns_independent_copies(tmp_path):
+    path = tmp_path / "manga_data.json"
+    write_json(path, '{"manga-id": {"title": "Title"}}', 1_000_000_000)
+
+    manga_data = utils.open_manga_data(path)
+    manga_data["manga-id"]["title"] = "Changed"
+    manga_data["other-id"] = {}
+
+    assert utils.open_manga_data(path) == {"manga-id": {"title": "Title"}}
+
+
+def test_load_json_file_shares_parsed_data_while_unchanged(tmp_path):
+    path = tmp_path / "data.json"
+    write_json(path, '{"a": 1}', 1_000_000_000)
+    first = utils.load_json_file(path)
+
+    assert utils.load_json_file(path) is first
+
+    write_json(path, '{"a": 2}', 2_000_000_000)
+    assert utils.load_json_file(path) == {"a": 2}
+
+
+def test_read_only_loaders_return_views(tmp_path):
+    path = tmp_path / "manga_map.json"
+    write_json(path, '{"manga-id": ["1"]}', 1_000_000_000)
+
+    manga_map = utils.open_manga_id_map(path)
+    assert isinstance(manga_map, MappingProxyType)
+    assert manga_map == {"manga-id": ["1"]}
+    assert isinstance(utils.open_title_regex(path), MappingProxyType)
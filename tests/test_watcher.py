@@ -0,0 +1,104 @@
+import queue
+import signal
+import threading
+import time
+
+import pymongo
+import pytest
+
+from publoader.workers import watcher
+
+
+class FakeDeleterModule:
+    def __init__(self, backlog=()):
+        self.backlog = list(backlog)
+        self.processed = []
+        self.flushes = []
+
+    def fetch_data_from_database(self):
+        return iter(self.backlog)
+
+    def run(self, item, http_client, queue_webhook):
+        self.processed.append(item["_id"])
+
+    def flush_deleted_chapters(self):
+        self.flushes.append(list(self.processed))
+
+
+def test_terminating_the_watcher_flushes_the_deleter():
+    worker_module = FakeDeleterModule()
+    worker_module.processed.append(1)
+
+    with pytest.raises(SystemExit):
+        watcher.stop_watcher("deleter", worker_module, signal.SIGTERM, None)
+
+    assert worker_module.flushes == [[1]]
+
+
+def test_fill_queue_reopens_expired_cursor(monkeypatch):
+    monkeypatch.setattr(watcher, "bot_queue", queue.Queue())
+    calls = []
+
+    class ExpiringModule:
+        def fetch_data_from_database(self):
+            calls.append(None)
+            yield {"_id": 1}
+            yield {"_id": 2}
+            if len(calls) == 1:
+                raise pymongo.errors.CursorNotFound("cursor id not found")
+            yield {"_id": 3}
+
+    watcher.fill_queue(ExpiringModule(), threading.Event())
+
+    assert len(calls) == 2
+    assert [item["_id"] for item in watcher.bot_queue.queue] == [1, 2, 3]
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def bot_queue(monkeypatch):
+    bot_queue = queue.Queue(maxsize=2)
+    monkeypatch.setattr(watcher, "bot_queue", bot_queue)
+    monkeypatch.setattr(watcher, "filler_thread", None)
+    return bot_queue
+
+
+def test_worker_flushes_once_the_queue_drains(bot_queue):
+    worker_module = FakeDeleterModule()
+    bot_queue.put({"_id": 1})
+    bot_queue.put({"_id": 2})
+
+    threading.Thread(
+        target=watcher.worker,
+        daemon=True,
+        args=("deleter", worker_module, None, None),
+    ).start()
+
+    assert wait_for(lambda: worker_module.flushes)
+    bot_queue.put({"_id": 3})
+    assert wait_for(lambda: len(worker_module.flushes) == 2)
+    assert worker_module.flushes == [[1, 2], [1, 2, 3]]
+
+
+def test_setup_threads_resets_the_queue(bot_queue, monkeypatch):
+    # Only the filler is under test, the workers would drain the queue
+    monkeypatch.setattr(watcher, "worker", lambda *args, **kwargs: None)
+    first_module = FakeDeleterModule({"_id": i} for i in range(10))
+
+    watcher.setup_threads("deleter", None, first_module)
+    assert wait_for(bot_queue.full)
+    first_filler = watcher.filler_thread
+
+    watcher.setup_threads("deleter", None, FakeDeleterModule())
+
+    assert not first_filler.is_alive()
+    assert bot_queue.qsize() == 0
+    assert bot_queue.unfinished_tasks == 0
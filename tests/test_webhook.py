@@ -0,0 +1,38 @@
+import queue
+
+import pytest
+from discord_webhook import DiscordEmbed
+
+from publoader import webhook
+
+
+@pytest.fixture
+def sent_batches(monkeypatch):
+    sent_batches = []
+
+    def send_webhook(self, local_webhook=webhook.webhook):
+        sent_batches.append([embed.title for embed in local_webhook.embeds])
+        local_webhook.embeds.clear()
+        return True
+
+    monkeypatch.setattr(webhook.WebhookHelper, "send_webhook", send_webhook)
+    monkeypatch.setattr(webhook, "webhook_queue", queue.Queue())
+    monkeypatch.setattr(webhook, "_webhook_sender", None)
+    return sent_batches
+
+
+def test_queued_embeds_are_sent_in_batches_of_ten(sent_batches):
+    for count in range(10):
+        webhook.queue_embed(DiscordEmbed(title=str(count)))
+
+    webhook.flush_webhooks()
+
+    assert sent_batches == [[str(count) for count in range(10)]]
+
+
+def test_sync_send_goes_out_after_the_queued_embeds(sent_batches):
+    for count in range(10):
+        webhook.queue_embed(DiscordEmbed(title=str(count)))
+
+    assert webhook.PubloaderWebhook(None, title="sync").send(sync=True)
+    assert sent_batches == [[str(count) for count in range(10)], ["sync"]]